@@ -53,15 +53,19 @@ class AggregatedMetrics:
 class PerformanceMonitor:
     """性能監控器"""
     
-    def __init__(self, max_history: int = 10000):
+    def __init__(self, max_history: int = 10000, batch_size: int = 64):
         """
         初始化性能監控器
         
         Args:
             max_history: 最多保存的歷史記錄數量
+            batch_size: 暫存多少筆指標後才批次寫入統計
         """
         self.max_history = max_history
+        self.batch_size = batch_size
         self.request_history: deque = deque(maxlen=max_history)
+        # 尚未寫入統計的指標；deque.append 為執行緒安全，不需持鎖
+        self._pending: deque = deque()
         self.lock = threading.Lock()
         
         # 使用 defaultdict 動態創建統計 - 支援任何實現類型
@@ -136,8 +140,27 @@ class PerformanceMonitor:
         return metrics
     
     def _record_metrics(self, metrics: RequestMetrics):
-        """記錄指標到統計中"""
+        """暫存指標，累積到 batch_size 筆時批次寫入統計"""
+        self._pending.append(metrics)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """將暫存的指標一次寫入歷史與統計
+
+        Returns:
+            本次寫入的指標數量
+        """
         with self.lock:
+            return self._drain_pending_locked()
+
+    def _drain_pending_locked(self) -> int:
+        """寫入所有暫存指標（呼叫方須持有 self.lock）"""
+        count = 0
+        while self._pending:
+            metrics = self._pending.popleft()
+            count += 1
+
             # 添加到歷史記錄
             self.request_history.append(metrics)
             
@@ -157,13 +180,15 @@ class PerformanceMonitor:
                         "error": metrics.error_message,
                         "character_id": metrics.character_id
                     })
-            
-            logger.debug(f"記錄指標: {metrics.implementation} - {metrics.endpoint}, "
-                        f"成功: {metrics.success}, 耗時: {metrics.duration:.2f}s")
+
+        if count:
+            logger.debug(f"批次記錄指標: {count} 筆")
+        return count
     
     def get_current_stats(self) -> Dict[str, AggregatedMetrics]:
         """獲取當前統計數據"""
         with self.lock:
+            self._drain_pending_locked()
             result = {}
             
             for impl_name, stats in self.stats.items():
@@ -202,6 +227,7 @@ class PerformanceMonitor:
         cutoff_time = time.time() - (minutes * 60)
         
         with self.lock:
+            self._drain_pending_locked()
             return [
                 metrics for metrics in self.request_history 
                 if metrics.start_time >= cutoff_time
@@ -220,6 +246,7 @@ class PerformanceMonitor:
         cutoff_time = datetime.now() - timedelta(hours=hours)
         
         with self.lock:
+            self._drain_pending_locked()
             error_summary: Dict[str, Any] = {}
 
             # Create buckets for all known implementations (dynamic).
@@ -255,6 +282,7 @@ class PerformanceMonitor:
     def reset_stats(self):
         """重置統計數據"""
         with self.lock:
+            self._pending.clear()
             self.request_history.clear()
             for impl_stats in self.stats.values():
                 impl_stats["total_requests"] = 0
@@ -265,6 +293,18 @@ class PerformanceMonitor:
             
             logger.info("性能監控統計數據已重置")
 
+class NoopPerformanceMonitor:
+    """停用監控時使用的空實作：不記錄任何指標，end_request 回傳 None"""
+
+    def start_request(self, implementation: str, endpoint: str,
+                      character_id: str = "", session_id: str = "") -> None:
+        return None
+
+    def end_request(self, context: Any, success: bool,
+                    error_message: Optional[str] = None,
+                    response_length: int = 0) -> None:
+        return None
+
 # 全局性能監控器實例
 performance_monitor = PerformanceMonitor()
 
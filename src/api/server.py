@@ -5,31 +5,46 @@
 """
 
 import os
+import ast
 import uuid
 import time
 import asyncio
 import logging
+import queue
+import re
 import tempfile
 import json
 from datetime import datetime
-from typing import Dict, Optional, List, Any, Union
+from functools import lru_cache, wraps
+from weakref import WeakValueDictionary
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, List, Any, Tuple, Union
 import sys
 import codecs
-from dataclasses import asdict
+from dataclasses import asdict, dataclass, field
 import yaml
 
+import aiofiles
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Request, Body
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Body
 from ..version import __version__
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
-# 添加更完整的錯誤處理和日誌記錄
-import traceback
-
 # 自定義 StreamHandler 來處理 Windows 控制台編碼問題
 class SafeStreamHandler(logging.StreamHandler):
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        # 讓底層 TextIOWrapper 以替代字符輸出無法編碼的字元（Python 3.7+）
+        reconfigure = getattr(self.stream, "reconfigure", None)
+        if reconfigure is not None:
+            try:
+                reconfigure(errors="replace")
+            except Exception:
+                pass
+
     def emit(self, record):
         try:
             msg = self.format(record)
@@ -38,30 +53,34 @@ class SafeStreamHandler(logging.StreamHandler):
             try:
                 stream.write(msg + self.terminator)
             except UnicodeEncodeError:
-                # 對於 Windows 控制台，移除不能顯示的字符或使用替代字符
-                safe_msg = "".join(c if ord(c) < 128 else '?' for c in msg)
+                # 無法重設 errors 的串流：以 C 層編解碼器替換不能顯示的字符
+                encoding = getattr(stream, "encoding", None) or "ascii"
+                safe_msg = msg.encode(encoding, "replace").decode(encoding)
                 stream.write(safe_msg + self.terminator)
             self.flush()
         except Exception:
             self.handleError(record)
 
 # 設置日誌記錄器，確保使用 UTF-8 編碼
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('api_server.log', mode='w', encoding='utf-8')
-    ]
-)
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+file_handler = logging.FileHandler('api_server.log', mode='w', encoding='utf-8')
+file_handler.setLevel(logging.DEBUG)
+file_handler.setFormatter(_log_formatter)
 
 # 添加安全控制台處理器
 console_handler = SafeStreamHandler()
 console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+console_handler.setFormatter(_log_formatter)
+
+# 根日誌記錄器只掛 QueueHandler：記錄呼叫僅入列，檔案/控制台 I/O 由背景執行緒處理，
+# 避免在事件迴圈中做磁碟寫入
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log_listener = QueueListener(_log_queue, file_handler, console_handler, respect_handler_level=True)
 
-# 獲取根日誌記錄器並添加處理器
 root_logger = logging.getLogger()
-root_logger.addHandler(console_handler)
+root_logger.setLevel(logging.DEBUG)
+root_logger.addHandler(QueueHandler(_log_queue))
+log_listener.start()
 
 # 模組日誌記錄器
 logger = logging.getLogger(__name__)
@@ -76,6 +95,8 @@ from ..utils.config import load_config
 from ..core.dspy.config import DSPyConfig
 from ..core.audio.context_utils import (
     format_history_for_audio,
+    filter_history_lines,
+    render_history_for_audio,
     build_available_audio_contexts,
     summarize_character,
     build_audio_template_rules,
@@ -85,7 +106,9 @@ from ..core.dspy.audio_modules import (
     get_audio_disfluency_module,
 )
 from ..llm.dspy_gemini_adapter import start_dspy_debug_log
-from .performance_monitor import get_performance_monitor
+from ..llm.gemini_client import GeminiClient
+from ..utils.audio_processor import check_audio_format, preprocess_audio, get_audio_mime_type
+from .performance_monitor import get_performance_monitor, NoopPerformanceMonitor
 from .health_monitor import get_health_monitor
 
 # SpeechInput Handler Initialization
@@ -150,19 +173,74 @@ class SelectResponseRequest(BaseModel):
     selected_response: str
     allow_custom: bool = False
 
+@dataclass(slots=True)
+class Session:
+    """單一客戶端會話的狀態"""
+    session_id: str
+    dialogue_manager: Any
+    character_id: str
+    implementation_version: str = "optimized"  # Phase 5: 記錄實現版本
+    created_at: float = 0.0
+    last_activity: float = 0.0
+    logs: Dict[str, Optional[str]] = field(default_factory=dict)
+    last_performance_metrics: Optional[Any] = None
+    character_profile: str = ""  # summarize_character 結果，建立會話時計算一次
+    # 音頻上下文用的已過濾歷史行（增量更新，來源列表被替換時重建）
+    audio_history_lines: List[str] = field(default_factory=list)
+    audio_history_source: Optional[List[str]] = None
+    audio_history_seen: int = 0
+
+    def audio_history_text(self, max_lines: int = 20) -> str:
+        """回傳帶角色提醒的近期歷史，只處理上次之後新增的歷史行"""
+        dm = self.dialogue_manager
+        character = getattr(dm, 'character', None)
+        history = getattr(dm, 'conversation_history', None) or []
+        if history is not self.audio_history_source or len(history) < self.audio_history_seen:
+            self.audio_history_source = history
+            self.audio_history_lines = []
+            self.audio_history_seen = 0
+        if len(history) > self.audio_history_seen:
+            self.audio_history_lines.extend(filter_history_lines(history[self.audio_history_seen:]))
+            del self.audio_history_lines[:-max_lines]
+            self.audio_history_seen = len(history)
+        return render_history_for_audio(
+            self.audio_history_lines,
+            getattr(character, 'name', None),
+            getattr(character, 'persona', None),
+            max_lines,
+        )
+
+# 對話端點的請求監控開關（PERF_MONITOR=0 時不建立任何指標物件）
+_MONITOR_ENABLED = os.getenv("PERF_MONITOR", "1") == "1"
+_NOOP_MONITOR = NoopPerformanceMonitor()
+
+def _request_monitor():
+    """取得對話端點使用的監控器；停用時回傳不做事的空實作"""
+    return get_performance_monitor() if _MONITOR_ENABLED else _NOOP_MONITOR
+
 # 會話存儲，用於維護多個客戶端的對話狀態
-session_store: Dict[str, Dict[str, Any]] = {}
+session_store: Dict[str, Session] = {}
+
+# 保護 session_store 寫入（新增/刪除）的鎖；讀取不需上鎖
+_SESSIONS_LOCK = asyncio.Lock()
 
 # 角色記憶體緩存，避免重複創建角色實例
-character_cache: Dict[str, Character] = {}
+# 以弱參照保存：所有引用該角色的會話都結束後，角色物件可被回收
+character_cache: "WeakValueDictionary[str, Character]" = WeakValueDictionary()
 
 # 創建 FastAPI 應用
 app = FastAPI(
     title="對話系統 API",
     description="提供對話系統的 HTTP 接口，接收文本或音頻輸入並返回對話回應",
-    version=__version__
+    version=__version__,
+    default_response_class=ORJSONResponse,
 )
 
+@app.on_event("shutdown")
+async def _stop_log_listener():
+    """關閉服務時停止日誌背景執行緒，確保佇列中的記錄都已寫出"""
+    log_listener.stop()
+
 # 添加 CORS 中間件以支持跨域請求
 app.add_middleware(
     CORSMiddleware,
@@ -176,13 +254,17 @@ app.add_middleware(
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """記錄所有請求和請求體"""
+    # 未啟用 DEBUG 時不讀取/複製請求體（避免大型上傳被整包載入記憶體）
+    if not logger.isEnabledFor(logging.DEBUG):
+        return await call_next(request)
+
     # 記錄請求信息
-    logger.debug(f"接收到請求: {request.method} {request.url}")
-    logger.debug(f"請求頭: {request.headers}")
+    logger.debug("接收到請求: %s %s", request.method, request.url)
+    logger.debug("請求頭: %s", request.headers)
     
     # 讀取並記錄請求體，但需要克隆它以便於後續讀取
     body = await request.body()
-    logger.debug(f"原始請求體: {body}")
+    logger.debug("原始請求體: %s", body)
     
     # 重建請求以便於後續處理
     async def receive():
@@ -206,19 +288,22 @@ async def get_session_history(session_id: str, token: Optional[str] = None):
     if env_token and token != env_token:
         raise HTTPException(status_code=403, detail="Forbidden: invalid token")
 
-    if session_id not in session_store:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = session_store[session_id]
-    dm = session.get("dialogue_manager")
+    dm = session.dialogue_manager
     if dm is None:
         raise HTTPException(status_code=500, detail="Dialogue manager missing in session")
 
     history = list(getattr(dm, "conversation_history", []))
     structured_history = list(getattr(dm, "structured_history", []))
     pending_turn = getattr(dm, "pending_turn", None)
-    impl = session.get("implementation_version", "unknown")
+    impl = session.implementation_version
     log_path = getattr(dm, "log_filepath", None)
+    # 互動日誌採緩衝寫入；回傳檔案路徑前先寫出，讓前端讀到的檔案內容是最新的
+    if hasattr(dm, "save_interaction_log"):
+        dm.save_interaction_log(force=True)
 
     return {
         "status": "success",
@@ -248,13 +333,21 @@ async def set_max_history(request: dict = Body(...)):
         logger.error(f"Failed to set max history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@lru_cache(maxsize=256)
+def _parse_character_config(raw: str) -> Any:
+    """解析 character_config JSON 字串；客戶端每回合常重送相同內容，故以字串為鍵快取結果
+
+    回傳的物件為共用快取，呼叫端不可就地修改。
+    """
+    return orjson.loads(raw)
+
 # 依賴注入：獲取或創建會話
 async def get_or_create_session(
     request: Request,
     session_id: Optional[str] = None,
     character_id: Optional[str] = None,
     character_config: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
+) -> Tuple[str, Session]:
     """獲取現有會話或創建新會話
 
     Args:
@@ -264,14 +357,15 @@ async def get_or_create_session(
         character_config: 客戶端提供的角色設定 (可選)
 
     Returns:
-        會話數據字典
+        (會話ID, 會話對象)
     """
-    logger.debug(f"嘗試獲取或創建會話: session_id={session_id}, character_id={character_id}, character_config={'提供' if character_config else '未提供'}")
+    logger.debug("嘗試獲取或創建會話: session_id=%s, character_id=%s, character_config=%s", session_id, character_id, '提供' if character_config else '未提供')
     
     # 如果已存在會話，則返回
-    if session_id and session_id in session_store:
-        logger.debug(f"找到現有會話: {session_id}")
-        return session_store[session_id]
+    existing = session_store.get(session_id) if session_id else None
+    if existing is not None:
+        logger.debug("找到現有會話: %s", session_id)
+        return session_id, existing
     
     # 嘗試從請求體獲取 character_id 和 character_config (如果未直接提供)
     if not character_id or character_config is None:
@@ -282,27 +376,27 @@ async def get_or_create_session(
             if "application/json" in content_type:
                 # 如果是 JSON 請求
                 body = await request.json()
-                logger.debug(f"解析後的 JSON 請求體: {body}")
+                logger.debug("解析後的 JSON 請求體: %s", body)
                 if "character_id" in body and not character_id:
                     character_id = body["character_id"]
-                    logger.debug(f"從 JSON 請求體提取 character_id: {character_id}")
+                    logger.debug("從 JSON 請求體提取 character_id: %s", character_id)
                 if "character_config" in body and character_config is None:
                     character_config = body["character_config"]
-                    logger.debug(f"從 JSON 請求體提取 character_config")
+                    logger.debug("從 JSON 請求體提取 character_config")
             elif "multipart/form-data" in content_type:
                 # 如果是多部分表單請求（如音頻上傳），則 character_config 可能來自 character_config_json 欄位
                 form = await request.form()
-                logger.debug(f"解析後的多部分表單數據: {form}")
+                logger.debug("解析後的多部分表單數據: %s", form)
                 
                 if "character_id" in form and not character_id:
                     character_id = form["character_id"]
-                    logger.debug(f"從表單提取 character_id: {character_id}")
+                    logger.debug("從表單提取 character_id: %s", character_id)
                 
                 if "character_config_json" in form and character_config is None:
                     try:
                         character_config_json = form["character_config_json"]
-                        character_config = json.loads(character_config_json)
-                        logger.debug(f"從表單 character_config_json 字段提取並解析 character_config")
+                        character_config = _parse_character_config(character_config_json)
+                        logger.debug("從表單 character_config_json 字段提取並解析 character_config")
                     except json.JSONDecodeError as e:
                         logger.error(f"解析表單中的 character_config_json 失敗: {e}")
         except Exception as e:
@@ -317,8 +411,9 @@ async def get_or_create_session(
         )
     
     # 獲取或創建角色實例
-    if character_id not in character_cache:
-        logger.debug(f"創建新角色: {character_id}")
+    character = character_cache.get(character_id)
+    if character is None:
+        logger.debug("創建新角色: %s", character_id)
         
         # 創建基本角色
         if character_config:
@@ -330,7 +425,7 @@ async def get_or_create_session(
                 if isinstance(character_config, str):
                     try:
                         logger.info("character_config 是字符串，嘗試解析為 JSON")
-                        character_config = json.loads(character_config)
+                        character_config = _parse_character_config(character_config)
                         logger.info("成功將 character_config 字符串解析為字典")
                     except json.JSONDecodeError as e:
                         logger.error(f"解析 character_config 字符串失敗: {e}")
@@ -342,7 +437,8 @@ async def get_or_create_session(
                             logger.warning(f"從配置載入角色失敗，使用預設: {le}")
                             character = create_default_character(character_id)
                 
-                logger.debug(f"配置內容: {json.dumps(character_config, ensure_ascii=False, indent=2)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("配置內容: %s", json.dumps(character_config, ensure_ascii=False, indent=2))
                 
                 # 提取必要字段
                 name = character_config.get("name", f"Patient_{character_id}")
@@ -358,7 +454,7 @@ async def get_or_create_session(
                     goal=goal,
                     details=details
                 )
-                logger.debug(f"成功使用客戶端配置創建角色: {character.name}")
+                logger.debug("成功使用客戶端配置創建角色: %s", character.name)
             except Exception as e:
                 logger.error(f"使用客戶端配置創建角色失敗: {e}", exc_info=True)
                 # 嘗試從配置載入，失敗再回退預設
@@ -381,12 +477,12 @@ async def get_or_create_session(
     
     # 創建新會話ID
     new_session_id = session_id or str(uuid.uuid4())
-    logger.debug(f"創建新會話: {new_session_id}")
+    logger.debug("創建新會話: %s", new_session_id)
     
     # 創建對話管理器
     try:
         dialogue_manager, implementation_version, debug_log_path = create_dialogue_manager_with_monitoring(
-            character=character_cache[character_id],
+            character=character,
             log_dir="logs/api",
             session_id=new_session_id,
         )
@@ -398,19 +494,24 @@ async def get_or_create_session(
         )
     
     # 存儲會話數據
-    session_store[new_session_id] = {
-        "dialogue_manager": dialogue_manager,
-        "character_id": character_id,
-        "implementation_version": implementation_version,  # Phase 5: 記錄實現版本
-        "created_at": asyncio.get_event_loop().time(),
-        "last_activity": asyncio.get_event_loop().time(),
-        "logs": {
+    now = time.monotonic()
+    session = Session(
+        session_id=new_session_id,
+        dialogue_manager=dialogue_manager,
+        character_id=character_id,
+        implementation_version=implementation_version,
+        created_at=now,
+        last_activity=now,
+        logs={
             "chat_gui": getattr(dialogue_manager, 'log_filepath', None),
             "dspy_debug": str(debug_log_path) if debug_log_path else None,
         },
-    }
-    
-    return session_store[new_session_id]
+        character_profile=summarize_character(character),
+    )
+    async with _SESSIONS_LOCK:
+        session_store[new_session_id] = session
+
+    return new_session_id, session
 
 def create_default_character(character_id: str) -> Character:
     """創建預設角色實例
@@ -449,29 +550,73 @@ def create_default_character(character_id: str) -> Character:
         }
     )
 
+# 上傳檔案分塊寫入大小（1 MiB），避免整個音檔一次載入記憶體
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# 共用的 GeminiClient（延遲建立），避免每個請求重建 SDK 客戶端與重讀設定；
+# 音頻轉錄的提示詞與計時隨結果回傳，並行請求不需互相等待
+_GEMINI_CLIENT: Optional[GeminiClient] = None
+
+def _get_gemini_client():
+    """取得共用的 GeminiClient 實例"""
+    global _GEMINI_CLIENT
+    if _GEMINI_CLIENT is None:
+        _GEMINI_CLIENT = GeminiClient()
+    return _GEMINI_CLIENT
+
+def _make_temp_path(suffix: str) -> str:
+    """在系統暫存目錄建立唯一暫存檔並回傳路徑（由呼叫方負責刪除）"""
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="audio_", dir=tempfile.gettempdir())
+    os.close(fd)
+    return path
+
+async def _save_upload_to_path(upload: UploadFile, path: str) -> None:
+    """以固定大小分塊將上傳檔案串流寫入磁碟"""
+    async with aiofiles.open(path, "wb") as f:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            await f.write(chunk)
+
+async def _read_upload_bytes(upload: UploadFile) -> bytes:
+    """以固定大小分塊將上傳檔案讀入記憶體（供不需暫存檔的轉錄流程使用）"""
+    buf = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        buf += chunk
+    return bytes(buf)
+
+async def _safe_unlink(path: str) -> None:
+    """刪除臨時檔；檔案已不存在時直接略過（不先做 exists 檢查）"""
+    try:
+        await asyncio.to_thread(os.unlink, path)
+        logger.debug("已刪除臨時文件: %s", path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"刪除臨時文件時出錯: {e}")
+
 # 語音轉文本函數
 async def speech_to_text(
     audio_file: UploadFile,
     *,
     dialogue_manager: Optional[Any] = None,
     session_id: Optional[str] = None,
+    session: Optional[Session] = None,
 ) -> Dict[str, Any]:
     """將上傳的音頻文件轉換為文本，並提供多個可能的完整句子選項
 
     Args:
         audio_file: 上傳的音頻文件（支持 WAV, M4A, MP3, AAC 等格式）
+        session: 所屬會話（可選），提供時重用其快取的角色摘要與歷史
 
     Returns:
         包含原始識別和多個選項的字典
     """
-    logger.debug(f"開始處理音頻文件: {audio_file.filename}")
+    logger.debug("開始處理音頻文件: %s", audio_file.filename)
     
     temp_files = []  # 追蹤需要刪除的臨時文件
     trace_id = ""
     
     try:
         # 從文件名獲取擴展名
-        import mimetypes
         file_ext = os.path.splitext(audio_file.filename)[1].lower()
         if not file_ext:
             file_ext = '.wav'  # 默認擴展名
@@ -484,23 +629,18 @@ async def speech_to_text(
         _t_preprocess_end = None
         _t_transcribe_start = None
         _t_transcribe_end = None
-        _gemini_client_ref = None  # reference to gemini_client for timing extraction
+        gemini_audio_timings = None  # Gemini sub-timings captured right after transcription
         _t_file_save_start = time.time()
-        original_audio_path = f"temp_audio_{uuid.uuid4()}{file_ext}"
+        original_audio_path = _make_temp_path(file_ext)
         temp_files.append(original_audio_path)
 
-        with open(original_audio_path, "wb") as f:
-            content = await audio_file.read()
-            f.write(content)
+        await _save_upload_to_path(audio_file, original_audio_path)
         _t_file_save_end = time.time()
 
-        logger.debug(f"已保存臨時文件: {original_audio_path}")
-        
-        # 導入音頻處理工具
-        from ..utils.audio_processor import check_audio_format, preprocess_audio, get_audio_mime_type
+        logger.debug("已保存臨時文件: %s", original_audio_path)
         
         # 檢查音頻格式
-        if not check_audio_format(original_audio_path):
+        if not await asyncio.to_thread(check_audio_format, original_audio_path):
             logger.warning(f"上傳的音頻格式無效或不支持: {original_audio_path}")
             return {
                 "original": "音頻格式無效",
@@ -509,31 +649,29 @@ async def speech_to_text(
         
         # 獲取 MIME 類型
         mime_type = get_audio_mime_type(original_audio_path)
-        logger.debug(f"音頻 MIME 類型: {mime_type}")
+        logger.debug("音頻 MIME 類型: %s", mime_type)
         
         # 對於 WAV 格式，進行預處理以優化識別
         # 對於其他格式，直接使用原始文件
         _t_preprocess_start = time.time()
         if file_ext == '.wav':
-            processed_audio_path = f"processed_audio_{uuid.uuid4()}.wav"
+            processed_audio_path = _make_temp_path('.wav')
             temp_files.append(processed_audio_path)
 
-            processed_audio_path = preprocess_audio(
+            processed_audio_path = await asyncio.to_thread(
+                preprocess_audio,
                 input_file=original_audio_path,
-                output_file=processed_audio_path
+                output_file=processed_audio_path,
             )
-            logger.debug(f"WAV 音頻預處理完成: {processed_audio_path}")
+            logger.debug("WAV 音頻預處理完成: %s", processed_audio_path)
         else:
             # 其他格式直接使用
-            logger.debug(f"使用原始音頻文件: {original_audio_path}")
+            logger.debug("使用原始音頻文件: %s", original_audio_path)
             processed_audio_path = original_audio_path
         _t_preprocess_end = time.time()
         
         # 使用 GeminiClient 進行語音識別
         try:
-            from ..llm.gemini_client import GeminiClient
-            import json
-
             cfg = load_config()
             audio_cfg = cfg.get('audio', {}) if isinstance(cfg, dict) else {}
             use_ctx = bool(audio_cfg.get('use_context', False))
@@ -541,16 +679,15 @@ async def speech_to_text(
             character_obj = getattr(dialogue_manager, 'character', None) if (use_ctx and dialogue_manager) else None
             history_list = getattr(dialogue_manager, 'conversation_history', None) if (use_ctx and dialogue_manager) else None
 
-            gemini_client = GeminiClient()
-            _gemini_client_ref = gemini_client
+            gemini_client = _get_gemini_client()
             logger.info(f"使用 Gemini 進行音頻識別: {processed_audio_path}")
 
-            import uuid as _uuid
-            trace_id = str(_uuid.uuid4())
+            trace_id = str(uuid.uuid4())
 
             _t_transcribe_start = time.time()
             try:
-                transcription_json = gemini_client.transcribe_audio(
+                transcription_json, audio_meta = await asyncio.to_thread(
+                    gemini_client.transcribe_audio,
                     processed_audio_path,
                     character=character_obj if use_ctx else None,
                     conversation_history=history_list if use_ctx else None,
@@ -558,7 +695,10 @@ async def speech_to_text(
                     trace_id=trace_id,
                 )
             except Exception:
-                transcription_json = gemini_client.transcribe_audio(processed_audio_path)
+                transcription_json, audio_meta = await asyncio.to_thread(gemini_client.transcribe_audio, processed_audio_path)
+            gemini_audio_timings = audio_meta["timings"]
+            gemini_system_prompt = audio_meta["system_prompt"]
+            gemini_user_prompt = audio_meta["user_prompt"]
             _t_transcribe_end = time.time()
 
             try:
@@ -580,7 +720,7 @@ async def speech_to_text(
                         "file_save_s": round(_t_file_save_end - _t_file_save_start, 4) if _t_file_save_start is not None and _t_file_save_end is not None else None,
                         "audio_preprocess_s": round(_t_preprocess_end - _t_preprocess_start, 4) if _t_preprocess_start is not None and _t_preprocess_end is not None else None,
                         "gemini_transcribe_s": round(_t_transcribe_end - _t_transcribe_start, 4) if _t_transcribe_start is not None and _t_transcribe_end is not None else None,
-                        "gemini_sub_timings": getattr(_gemini_client_ref, '_last_audio_timings', None) if _gemini_client_ref else None,
+                        "gemini_sub_timings": gemini_audio_timings,
                     }
                     logger.info("[Timing] speech_to_text (early-return/empty): %s", _stt_timings_err)
                     return {
@@ -592,19 +732,23 @@ async def speech_to_text(
                 if not options or len(options) < 1:
                     options = [original]
 
-                character_profile = summarize_character(character_obj)
-                history_text = format_history_for_audio(
-                    history_list,
-                    getattr(character_obj, 'name', None) if character_obj else None,
-                    getattr(character_obj, 'persona', None) if character_obj else None,
-                )
+                if session is not None and character_obj is not None:
+                    character_profile = session.character_profile
+                    history_text = session.audio_history_text()
+                else:
+                    character_profile = summarize_character(character_obj)
+                    history_text = format_history_for_audio(
+                        history_list,
+                        getattr(character_obj, 'name', None) if character_obj else None,
+                        getattr(character_obj, 'persona', None) if character_obj else None,
+                    )
 
                 if audio_cfg.get('dspy', {}).get('normalize', False):
                     try:
                         disfluency_module = get_audio_disfluency_module()
                         normalized = disfluency_module.normalize(
-                            system_prompt=getattr(gemini_client, 'last_audio_system_prompt', getattr(gemini_client, 'last_audio_prompt', "")),
-                            user_prompt=getattr(gemini_client, 'last_audio_user_prompt', ""),
+                            system_prompt=gemini_system_prompt,
+                            user_prompt=gemini_user_prompt,
                             conversation_history=history_text,
                             raw_transcription=transcription_json,
                             trace_id=trace_id,
@@ -626,7 +770,7 @@ async def speech_to_text(
                     "file_save_s": round(_t_file_save_end - _t_file_save_start, 4),
                     "audio_preprocess_s": round(_t_preprocess_end - _t_preprocess_start, 4),
                     "gemini_transcribe_s": round(_t_transcribe_end - _t_transcribe_start, 4),
-                    "gemini_sub_timings": gemini_client._last_audio_timings,
+                    "gemini_sub_timings": gemini_audio_timings,
                 }
                 logger.info("[Timing] speech_to_text: %s", _stt_timings)
                 return {
@@ -648,7 +792,7 @@ async def speech_to_text(
                     "file_save_s": round(_t_file_save_end - _t_file_save_start, 4) if _t_file_save_start is not None and _t_file_save_end is not None else None,
                     "audio_preprocess_s": round(_t_preprocess_end - _t_preprocess_start, 4) if _t_preprocess_start is not None and _t_preprocess_end is not None else None,
                     "gemini_transcribe_s": round(_t_transcribe_end - _t_transcribe_start, 4) if _t_transcribe_start is not None and _t_transcribe_end is not None else None,
-                    "gemini_sub_timings": getattr(_gemini_client_ref, '_last_audio_timings', None) if _gemini_client_ref else None,
+                    "gemini_sub_timings": gemini_audio_timings,
                 }
                 logger.info("[Timing] speech_to_text (early-return/json-error): %s", _stt_timings_err)
                 return {
@@ -668,7 +812,7 @@ async def speech_to_text(
                 "file_save_s": round(_t_file_save_end - _t_file_save_start, 4) if _t_file_save_start is not None and _t_file_save_end is not None else None,
                 "audio_preprocess_s": round(_t_preprocess_end - _t_preprocess_start, 4) if _t_preprocess_start is not None and _t_preprocess_end is not None else None,
                 "gemini_transcribe_s": round(_t_transcribe_end - _t_transcribe_start, 4) if _t_transcribe_start is not None and _t_transcribe_end is not None else None,
-                "gemini_sub_timings": getattr(_gemini_client_ref, '_last_audio_timings', None) if _gemini_client_ref else None,
+                "gemini_sub_timings": gemini_audio_timings,
             }
             logger.info("[Timing] speech_to_text (early-return/exception): %s", _stt_timings_err)
             return {
@@ -688,40 +832,101 @@ async def speech_to_text(
         )
     
     finally:
-        # 清理所有臨時文件
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-                    logger.debug(f"已刪除臨時文件: {temp_file}")
-            except Exception as e:
-                logger.warning(f"刪除臨時文件時出錯: {e}")
+        # 清理所有臨時文件（並行於工作執行緒中刪除）
+        if temp_files:
+            await asyncio.gather(*(_safe_unlink(temp_file) for temp_file in temp_files))
 
 # 會話清理任務
-async def cleanup_old_sessions(background_tasks: BackgroundTasks):
+SESSION_TIMEOUT = 3600  # 1小時無活動則清理
+SESSION_CLEANUP_INTERVAL = 60  # 定期清理間隔（秒）
+
+async def cleanup_old_sessions() -> int:
     """清理長時間未活動的會話
 
-    Args:
-        background_tasks: FastAPI 背景任務
+    Returns:
+        被清理的會話數量
     """
-    current_time = asyncio.get_event_loop().time()
-    session_timeout = 3600  # 1小時無活動則清理
-    
-    sessions_to_remove = []
-    for session_id, session_data in session_store.items():
-        if current_time - session_data["last_activity"] > session_timeout:
-            sessions_to_remove.append(session_id)
+    current_time = time.monotonic()
     
-    for session_id in sessions_to_remove:
-        # 保存對話日誌後刪除會話
-        session_store[session_id]["dialogue_manager"].save_interaction_log()
-        del session_store[session_id]
+    # 迭代快照，避免與其他協程的新增/刪除互相干擾
+    sessions_to_remove = [
+        session_id
+        for session_id, session_data in list(session_store.items())
+        if current_time - session_data.last_activity > SESSION_TIMEOUT
+    ]
+    if not sessions_to_remove:
+        return 0
 
+    async with _SESSIONS_LOCK:
+        removed = [
+            session_data
+            for session_data in (session_store.pop(session_id, None) for session_id in sessions_to_remove)
+            if session_data is not None
+        ]
 
-def _extract_response_candidates(response_json: str) -> Dict[str, Any]:
+    # 會話已從存儲中移除；各會話的日誌寫檔在工作執行緒中並行進行
+    results = await asyncio.gather(
+        *(_cleanup_one_session(session_data) for session_data in removed),
+        return_exceptions=True,
+    )
+    for session_data, result in zip(removed, results):
+        if isinstance(result, Exception):
+            logger.error(f"清理會話 {session_data.session_id} 時保存日誌失敗: {result}")
+    return len(removed)
+
+async def _cleanup_one_session(session_data: Session) -> None:
+    """保存單一已移除會話的對話日誌（阻塞檔案 I/O 移至工作執行緒）"""
+    await asyncio.to_thread(session_data.dialogue_manager.save_interaction_log, True)
+
+async def _periodic_session_cleanup(interval: float = SESSION_CLEANUP_INTERVAL) -> None:
+    """背景常駐任務：每 interval 秒清理一次過期會話（取代每個請求各排一次清理）"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await cleanup_old_sessions()
+            if removed:
+                logger.info("已清理 %s 個過期會話", removed)
+        except Exception as e:
+            logger.error(f"定期清理會話失敗: {e}", exc_info=True)
+
+_CLEANUP_TASK: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def _start_session_cleanup():
+    global _CLEANUP_TASK
+    _CLEANUP_TASK = asyncio.create_task(_periodic_session_cleanup())
+
+@app.on_event("shutdown")
+async def _stop_session_cleanup():
+    if _CLEANUP_TASK is not None:
+        _CLEANUP_TASK.cancel()
+    # 互動日誌採緩衝寫入，關閉前將所有會話的剩餘記錄寫出
+    await asyncio.gather(
+        *(_cleanup_one_session(session_data) for session_data in list(session_store.values())),
+        return_exceptions=True,
+    )
+
+@app.post("/api/admin/cleanup")
+async def trigger_session_cleanup():
+    """立即清理過期會話（運維用）"""
+    removed = await cleanup_old_sessions()
+    return {
+        "status": "success",
+        "removed_sessions": removed,
+        "active_sessions": len(session_store),
+    }
+
+def _parse_response_json(response_json: Union[str, bytes, Dict[str, Any]]) -> Dict[str, Any]:
+    """process_turn 可能回傳 dict 或 JSON 字串；dict 直接沿用，字串以 orjson 解析一次"""
+    if isinstance(response_json, dict):
+        return response_json
+    return orjson.loads(response_json)
+
+
+def _extract_response_candidates(response_json: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
     """Parse model response JSON and normalize response candidates for pending selection."""
     try:
-        parsed = json.loads(response_json)
+        parsed = _parse_response_json(response_json)
     except json.JSONDecodeError as exc:
         raise HTTPException(status_code=500, detail=f"無法解析對話回應: {exc}")
 
@@ -767,40 +972,75 @@ def _register_pending_turn(
 
 
 def _attach_pending_selection_metadata(
-    response: DialogueResponse,
+    response: Dict[str, Any],
     pending_turn: Dict[str, Any],
-) -> DialogueResponse:
-    response.interaction_mode = "response_selection"
-    response.selection_required = True
-    response.selection_kind = str(pending_turn.get("selection_kind") or "")
-    response.pending_turn_id = str(pending_turn.get("pending_turn_id") or "")
-    response.selection_committed = False
+) -> Dict[str, Any]:
+    response["interaction_mode"] = "response_selection"
+    response["selection_required"] = True
+    response["selection_kind"] = str(pending_turn.get("selection_kind") or "")
+    response["pending_turn_id"] = str(pending_turn.get("pending_turn_id") or "")
+    response["selection_committed"] = False
     return response
 
+
+# DialogueResponse 欄位名稱（依宣告順序），用於直接建立回應字典
+_DIALOGUE_RESPONSE_FIELDS = tuple(DialogueResponse.__annotations__)
+
+def _dialogue_response_dict(**fields: Any) -> Dict[str, Any]:
+    """建立與 DialogueResponse 欄位一致的回應字典（未提供的欄位為 None）
+
+    端點直接以 ORJSONResponse 回傳此字典，省去 Pydantic 建模與再序列化；
+    DialogueResponse 仍作為 response_model 提供 OpenAPI 結構描述。
+    """
+    payload: Dict[str, Any] = dict.fromkeys(_DIALOGUE_RESPONSE_FIELDS)
+    payload.update(fields)
+    return payload
+
+def _response_length(response_json: Any) -> int:
+    """估算回應長度供性能監控使用（避免對整個 dict 產生 repr 字串）"""
+    if isinstance(response_json, (str, bytes)):
+        return len(response_json)
+    try:
+        return len(orjson.dumps(response_json, default=str))
+    except TypeError:
+        return 0
+
+# 整段為 JSON/Python 列表字面值（前後可有空白）
+_LIST_RE = re.compile(r'\s*\[.*\]\s*$', re.DOTALL)
+
+def _is_clean_response_list(res: Any) -> bool:
+    """判斷 responses 是否已是無需再解析的字串列表"""
+    return isinstance(res, list) and all(
+        isinstance(x, str) and not x.lstrip().startswith('[') for x in res
+    )
+
 # 添加一個輔助函數來處理回應格式化
 async def format_dialogue_response(
-    response_json: str,
+    response_json: Union[str, Dict[str, Any]],
     session_id: Optional[str] = None,
-    session: Optional[Dict[str, Any]] = None,
+    session: Optional[Session] = None,
     performance_metrics: Optional[Dict[str, Any]] = None,
-    dialogue_manager: Optional[Any] = None
-) -> DialogueResponse:
+    dialogue_manager: Optional[Any] = None,
+    parsed_response: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """格式化對話回應
     
     Args:
-        response_json: 對話管理器返回的 JSON 字符串
+        response_json: 對話管理器返回的 JSON 字符串（或已是 dict）
         session_id: 會話 ID
         session: 會話對象
+        parsed_response: 呼叫端已解析過的回應（提供時不再重複解析）
     
     Returns:
-        格式化的對話回應
+        與 DialogueResponse 欄位一致的回應字典
     """
     # 解析回應
-    logger.debug(f"格式化對話回應: {response_json}")
+    logger.debug("格式化對話回應: %s", response_json)
     
     try:
-        response_dict = json.loads(response_json)
-        logger.debug(f"解析後的 JSON 回應: {json.dumps(response_dict, ensure_ascii=False, indent=2)}")
+        response_dict = parsed_response if parsed_response is not None else _parse_response_json(response_json)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("解析後的 JSON 回應: %s", json.dumps(response_dict, ensure_ascii=False, indent=2))
     except json.JSONDecodeError as e:
         logger.error(f"解析 JSON 失敗: {e}")
         response_dict = {
@@ -812,14 +1052,18 @@ async def format_dialogue_response(
                 "message": str(e)
             }
         }
+    if not isinstance(response_dict, dict):
+        logger.error("對話回應不是 JSON 物件: %s", type(response_dict).__name__)
+        response_dict = {
+            "responses": [f"InvalidResponsePayload: {type(response_dict).__name__}"],
+            "state": "ERROR",
+            "dialogue_context": "JSON_PARSE_ERROR",
+        }
     
     # 找出當前會話ID
     current_session_id = session_id
     if not current_session_id and session:
-        for key, value in session_store.items():
-            if value is session:
-                current_session_id = key
-                break
+        current_session_id = session.session_id
     
     # 確保所有必要的鍵都存在於字典中，使用合理的預設值
     if "responses" not in response_dict or not response_dict["responses"]:
@@ -834,36 +1078,43 @@ async def format_dialogue_response(
         logger.warning("回應中缺少 dialogue_context 鍵，使用默認值")
         response_dict["dialogue_context"] = ""
 
+    # Phase 5: 版本信息（建立會話時已決定，這裡只讀取一次）
+    if session:
+        implementation_version = session.implementation_version
+    else:
+        implementation_version = getattr(dialogue_manager, '_impl_version', "optimized")
+
     # 規範化 responses：在非 optimized 實現下才執行深度規範化
     try:
-        impl = session.get("implementation_version", "optimized") if session else "optimized"
-        if impl != "optimized":
-            res = response_dict.get("responses")
+        res = response_dict.get("responses")
+        # 快速路徑：已是乾淨的字串列表（無 '[' 開頭的巢狀列表）則只需截斷
+        if implementation_version != "optimized" and _is_clean_response_list(res):
+            response_dict["responses"] = res[:5]
+        elif implementation_version != "optimized":
+            _json_loads = json.loads
             if isinstance(res, list) and len(res) == 1 and isinstance(res[0], str):
                 s = res[0].strip()
-                if s.startswith('[') and s.endswith(']'):
+                if _LIST_RE.match(s):
                     parsed = None
                     try:
-                        parsed = json.loads(s)
+                        parsed = _json_loads(s)
                     except json.JSONDecodeError:
-                        import ast as _ast
                         try:
-                            parsed = _ast.literal_eval(s)
+                            parsed = ast.literal_eval(s)
                         except Exception:
                             parsed = None
                     if isinstance(parsed, list):
                         response_dict["responses"] = [str(x) for x in parsed[:5]]
             elif isinstance(res, str):
                 s = res.strip()
-                if s.startswith('[') and s.endswith(']'):
+                if _LIST_RE.match(s):
                     try:
-                        parsed = json.loads(s)
+                        parsed = _json_loads(s)
                         if isinstance(parsed, list):
                             response_dict["responses"] = [str(x) for x in parsed[:5]]
                     except json.JSONDecodeError:
-                        import ast as _ast
                         try:
-                            parsed = _ast.literal_eval(s)
+                            parsed = ast.literal_eval(s)
                             if isinstance(parsed, list):
                                 response_dict["responses"] = [str(x) for x in parsed[:5]]
                         except Exception:
@@ -887,11 +1138,10 @@ async def format_dialogue_response(
                         if closing != -1:
                             candidate = trimmed[:closing + 1]
                     try:
-                        parsed = json.loads(candidate)
+                        parsed = _json_loads(candidate)
                     except json.JSONDecodeError:
-                        import ast as _ast
                         try:
-                            parsed = _ast.literal_eval(candidate)
+                            parsed = ast.literal_eval(candidate)
                         except Exception:
                             parsed = None
                     if isinstance(parsed, list):
@@ -906,12 +1156,7 @@ async def format_dialogue_response(
     except Exception as _e:
         logger.warning(f"規範化 responses 失敗: {_e}")
     
-    # Phase 5: 準備版本信息和性能指標
-    implementation_version = "optimized"
-    if session and "implementation_version" in session:
-        implementation_version = session["implementation_version"]
-    
-    # 構建性能指標字典（如果有的話）
+    # Phase 5: 構建性能指標字典（如果有的話）
     metrics_dict = None
     if performance_metrics:
         metrics_dict = {
@@ -921,7 +1166,7 @@ async def format_dialogue_response(
         }
         
         # 如果是優化版本，添加 API 調用節省統計
-        if implementation_version == "optimized" and hasattr(dialogue_manager, 'get_optimization_statistics'):
+        if implementation_version == "optimized" and getattr(dialogue_manager, '_has_opt_stats', False):
             try:
                 opt_stats = dialogue_manager.get_optimization_statistics()
                 metrics_dict.update({
@@ -932,31 +1177,39 @@ async def format_dialogue_response(
             except Exception as e:
                 logger.warning(f"無法獲取優化統計: {e}")
     
-    # 構建回應對象
-    try:
-        response = DialogueResponse(
+    # 構建回應字典（欄位與 DialogueResponse 相同，直接以 ORJSONResponse 輸出）
+    # 不經 Pydantic 驗證，List[str] 欄位在此自行轉為字串；任何例外改回傳錯誤回應
+    try:
+        responses = response_dict["responses"]
+        if not isinstance(responses, list):
+            responses = [responses]
+        speech_options = response_dict.get("speech_recognition_options", None)
+        if speech_options is not None:
+            if not isinstance(speech_options, list):
+                speech_options = [speech_options]
+            speech_options = [x if isinstance(x, str) else str(x) for x in speech_options]
+        return _dialogue_response_dict(
             status="success",
-            responses=response_dict["responses"],
-            state=response_dict["state"],
-            dialogue_context=response_dict["dialogue_context"],
-            session_id=current_session_id or str(uuid.uuid4()),
-            inferred_speaker_role=response_dict.get("inferred_speaker_role"),  # 推理出的提問者角色
-            speech_recognition_options=response_dict.get("speech_recognition_options", None),
+            responses=[x if isinstance(x, str) else str(x) for x in responses],
+            state=str(response_dict["state"]),
+            dialogue_context=str(response_dict["dialogue_context"]),
+            session_id=current_session_id or str(uuid.uuid4()),
+            inferred_speaker_role=response_dict.get("inferred_speaker_role"),  # 推理出的提問者角色
+            speech_recognition_options=speech_options,
             implementation_version=implementation_version,  # Phase 5: 版本信息
             performance_metrics=metrics_dict,  # Phase 5: 性能指標
-            processing_info=response_dict.get("processing_info"),
-            logs=(session or {}).get("logs") if session else None,
-            interaction_mode=response_dict.get("interaction_mode"),
-            selection_required=response_dict.get("selection_required"),
-            selection_kind=response_dict.get("selection_kind"),
-            pending_turn_id=response_dict.get("pending_turn_id"),
-            selection_committed=response_dict.get("selection_committed"),
-            committed_response=response_dict.get("committed_response"),
-        )
-        return response
+            processing_info=response_dict.get("processing_info"),
+            logs=session.logs if session else None,
+            interaction_mode=response_dict.get("interaction_mode"),
+            selection_required=response_dict.get("selection_required"),
+            selection_kind=response_dict.get("selection_kind"),
+            pending_turn_id=response_dict.get("pending_turn_id"),
+            selection_committed=response_dict.get("selection_committed"),
+            committed_response=response_dict.get("committed_response"),
+        )
     except Exception as e:
-        logger.error(f"創建 DialogueResponse 時出錯: {e}", exc_info=True)
-        return DialogueResponse(
+        logger.error(f"建立對話回應時出錯: {e}", exc_info=True)
+        return _dialogue_response_dict(
             status="error",
             responses=[f"DialogueResponseError[{type(e).__name__}]: {e}"],
             state="ERROR",
@@ -978,7 +1231,7 @@ def create_dialogue_manager_with_monitoring(character: Character, log_dir: str =
     Returns:
         (DialogueManager 實例, 實現版本字符串)
     """
-    logger.debug(f"創建對話管理器，角色: {character.name}, 類型: {type(character)}")
+    logger.debug("創建對話管理器，角色: %s, 類型: %s", character.name, type(character))
     # 使用 session 短ID 讓 dspy_debug 與 chat_gui 一一對應
     sess_short = (session_id or "")[:8] if session_id else ""
     tag = character.name if not sess_short else f"{character.name}_sess_{sess_short}"
@@ -987,8 +1240,7 @@ def create_dialogue_manager_with_monitoring(character: Character, log_dir: str =
         logger.info(f"已建立新的 DSPy 除錯日誌: {log_path}")
     try:
         # 使用工廠函數創建對話管理器（提供每會話專屬檔名前綴）
-        from datetime import datetime as _dt
-        ts = _dt.now().strftime('%Y%m%d_%H%M%S')
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
         base = f"{ts}_{character.name}"
         if sess_short:
             base = f"{base}_sess_{sess_short}"
@@ -1005,8 +1257,11 @@ def create_dialogue_manager_with_monitoring(character: Character, log_dir: str =
         except Exception as _e:
             logger.warning(f"設定 chat_gui 檔名失敗（將使用預設）: {_e}")
         
-        # 檢測實現版本
+        # 檢測實現版本（同時記錄在管理器上，供無 session 的呼叫方直接讀取）
         implementation_version = "optimized"
+        manager._impl_version = implementation_version
+        # 建立時探測一次能力旗標，避免每回合 hasattr 查詢
+        manager._has_opt_stats = callable(getattr(manager, 'get_optimization_statistics', None))
         
         logger.info(f"成功創建對話管理器: {type(manager).__name__} (版本: {implementation_version})")
         return manager, implementation_version, log_path
@@ -1014,27 +1269,95 @@ def create_dialogue_manager_with_monitoring(character: Character, log_dir: str =
         logger.error(f"創建對話管理器失敗: {e}", exc_info=True)
         raise
 
+def _async_ttl_cache(ttl: float = 1.0, maxsize: int = 32):
+    """為唯讀的監控查詢提供短時間 TTL 快取（依呼叫參數區分）
+
+    高頻輪詢（例如多個 scraper 同時抓取）在 ttl 秒內只會觸發一次實際聚合。
+    參數可能來自客戶端（如 hours），寫入時會清掉過期項目並以 maxsize 限制筆數。
+    被裝飾的函數可透過 `.cache_clear()` 立即失效。
+    """
+    def decorator(func):
+        cache: Dict[Tuple[Any, ...], Tuple[Any, float]] = {}
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            hit = cache.get(key)
+            if hit is not None and hit[1] > now:
+                return hit[0]
+            value = await func(*args, **kwargs)
+            now = time.monotonic()
+            for stale_key in [k for k, (_, expires_at) in cache.items() if expires_at <= now]:
+                del cache[stale_key]
+            cache.pop(key, None)
+            # dict 維持插入順序：超過上限時先淘汰最早寫入的項目
+            while len(cache) >= maxsize:
+                del cache[next(iter(cache))]
+            cache[key] = (value, now + ttl)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+@_async_ttl_cache(ttl=1.0)
+async def _performance_stats_snapshot() -> Dict[str, Any]:
+    current_stats = get_performance_monitor().get_current_stats()
+    return {
+        implementation: {
+            "total_requests": stats.total_requests,
+            "successful_requests": stats.successful_requests,
+            "failed_requests": stats.failed_requests,
+            "avg_response_time": round(stats.avg_response_time, 3),
+            "error_rate": round(stats.error_rate * 100, 2),  # 轉為百分比
+            "last_updated": stats.last_updated.isoformat()
+        }
+        for implementation, stats in current_stats.items()
+    }
+
+@_async_ttl_cache(ttl=1.0)
+async def _error_summary_snapshot(hours: int) -> Dict[str, Any]:
+    return get_performance_monitor().get_error_summary(hours=hours)
+
+@_async_ttl_cache(ttl=1.0)
+async def _health_status_snapshot() -> Dict[str, Any]:
+    health_monitor = get_health_monitor()
+    health_statuses = health_monitor.check_health(get_performance_monitor())
+    return {
+        "health_statuses": {
+            implementation: {
+                "is_healthy": status.is_healthy,
+                "error_rate": round(status.error_rate * 100, 2),
+                "avg_response_time": round(status.avg_response_time, 3),
+                "recent_errors": status.recent_errors,
+                "issues": status.issues,
+                "last_check": status.last_check.isoformat()
+            }
+            for implementation, status in health_statuses.items()
+        },
+        "monitor_status": health_monitor.get_status()
+    }
+
+@_async_ttl_cache(ttl=1.0)
+async def _comparison_report_snapshot() -> Dict[str, Any]:
+    return get_performance_monitor().get_comparison_report()
+
+def _clear_monitor_snapshots() -> None:
+    """統計重置或閾值變更後讓監控快取立即失效"""
+    _performance_stats_snapshot.cache_clear()
+    _error_summary_snapshot.cache_clear()
+    _health_status_snapshot.cache_clear()
+    _comparison_report_snapshot.cache_clear()
+
 # Phase 5: 性能監控端點
 @app.get("/api/monitor/stats")
 async def get_performance_stats():
-    """獲取性能統計數據"""
+    """獲取性能統計數據（1 秒快取）"""
     try:
-        performance_monitor = get_performance_monitor()
-        current_stats = performance_monitor.get_current_stats()
-        
         return {
             "status": "success",
-            "stats": {
-                implementation: {
-                    "total_requests": stats.total_requests,
-                    "successful_requests": stats.successful_requests,
-                    "failed_requests": stats.failed_requests,
-                    "avg_response_time": round(stats.avg_response_time, 3),
-                    "error_rate": round(stats.error_rate * 100, 2),  # 轉為百分比
-                    "last_updated": stats.last_updated.isoformat()
-                }
-                for implementation, stats in current_stats.items()
-            }
+            "stats": await _performance_stats_snapshot()
         }
     except Exception as e:
         logger.error(f"獲取性能統計失敗: {e}")
@@ -1042,20 +1365,23 @@ async def get_performance_stats():
 
 @app.get("/api/monitor/comparison")
 async def get_comparison_report():
-    """(Deprecated) 獲取對比報告（original 已移除，故不再提供）"""
-    raise HTTPException(status_code=410, detail="comparison report removed (original implementation removed)")
+    """(Deprecated) 獲取對比報告（1 秒快取；original 已移除，監控器回報 error 時回傳 410）"""
+    report = await _comparison_report_snapshot()
+    if "error" in report:
+        raise HTTPException(status_code=410, detail="comparison report removed (original implementation removed)")
+    return {
+        "status": "success",
+        "report": report
+    }
 
 @app.get("/api/monitor/errors")
 async def get_error_summary(hours: int = 24):
-    """獲取錯誤摘要"""
+    """獲取錯誤摘要（1 秒快取）"""
     try:
-        performance_monitor = get_performance_monitor()
-        error_summary = performance_monitor.get_error_summary(hours=hours)
-        
         return {
             "status": "success",
             "time_range_hours": hours,
-            "errors": error_summary
+            "errors": await _error_summary_snapshot(hours)
         }
     except Exception as e:
         logger.error(f"獲取錯誤摘要失敗: {e}")
@@ -1080,6 +1406,7 @@ async def reset_performance_stats():
     try:
         performance_monitor = get_performance_monitor()
         performance_monitor.reset_stats()
+        _clear_monitor_snapshots()
         
         return {
             "status": "success",
@@ -1089,29 +1416,14 @@ async def reset_performance_stats():
         logger.error(f"重置統計數據失敗: {e}")
         raise HTTPException(status_code=500, detail=f"重置失敗: {str(e)}")
 
-# Characters endpoint
-@app.get("/api/characters")
-async def get_characters():
-    """獲取可用角色列表"""
+CHARACTERS_FILE_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'characters.yaml')
+
+def _load_characters_yaml() -> Dict[str, Any]:
+    """讀取 characters.yaml 並預先建立 /api/characters 的回應字典（阻塞 I/O）"""
     try:
-        characters_file = os.path.join(os.path.dirname(__file__), '..', '..', 'config', 'characters.yaml')
-        
-        with open(characters_file, 'r', encoding='utf-8') as file:
+        with open(CHARACTERS_FILE_PATH, 'r', encoding='utf-8') as file:
             data = yaml.safe_load(file)
             characters = data.get('characters', {})
-            
-        return {
-            "status": "success",
-            "characters": {
-                char_id: {
-                    "name": char_data.get("name", f"Character {char_id}"),
-                    "persona": char_data.get("persona", ""),
-                    "backstory": char_data.get("backstory", "")[:100] + "..." if len(char_data.get("backstory", "")) > 100 else char_data.get("backstory", "")
-                }
-                for char_id, char_data in characters.items()
-            }
-        }
-        
     except FileNotFoundError:
         logger.error("characters.yaml 文件未找到")
         return {
@@ -1124,37 +1436,63 @@ async def get_characters():
                 }
             }
         }
+
+    summaries: Dict[str, Dict[str, str]] = {}
+    for char_id, char_data in characters.items():
+        bs = char_data.get("backstory", "")
+        summaries[char_id] = {
+            "name": char_data.get("name", f"Character {char_id}"),
+            "persona": char_data.get("persona", ""),
+            "backstory": bs if len(bs) <= 100 else bs[:100] + "...",
+        }
+
+    return {
+        "status": "success",
+        "characters": summaries,
+    }
+
+# 角色列表於模組載入時讀取一次；修改 characters.yaml 後呼叫 POST /api/characters/reload
+try:
+    _CHARACTERS_RESPONSE: Optional[Dict[str, Any]] = _load_characters_yaml()
+except Exception as e:
+    logger.error(f"載入角色列表失敗: {e}")
+    _CHARACTERS_RESPONSE = None
+
+# Characters endpoint
+@app.get("/api/characters")
+async def get_characters():
+    """獲取可用角色列表"""
+    global _CHARACTERS_RESPONSE
+    if _CHARACTERS_RESPONSE is not None:
+        return _CHARACTERS_RESPONSE
+    try:
+        _CHARACTERS_RESPONSE = await asyncio.to_thread(_load_characters_yaml)
+        return _CHARACTERS_RESPONSE
     except Exception as e:
         logger.error(f"獲取角色列表失敗: {e}")
         raise HTTPException(status_code=500, detail=f"角色列表獲取失敗: {str(e)}")
 
+@app.post("/api/characters/reload")
+async def reload_characters():
+    """重新讀取 characters.yaml 並更新角色列表快取"""
+    global _CHARACTERS_RESPONSE
+    try:
+        _CHARACTERS_RESPONSE = await asyncio.to_thread(_load_characters_yaml)
+    except Exception as e:
+        logger.error(f"重新載入角色列表失敗: {e}")
+        raise HTTPException(status_code=500, detail=f"角色列表重新載入失敗: {str(e)}")
+    return {
+        "status": "success",
+        "message": "角色列表已重新載入",
+        "count": len(_CHARACTERS_RESPONSE["characters"]),
+    }
+
 # Phase 5: 健康監控和回退端點
 @app.get("/api/health/status")
 async def get_health_status():
-    """獲取系統健康狀況"""
+    """獲取系統健康狀況（1 秒快取）"""
     try:
-        health_monitor = get_health_monitor()
-        performance_monitor = get_performance_monitor()
-        
-        # 執行健康檢查
-        health_statuses = health_monitor.check_health(performance_monitor)
-        monitor_status = health_monitor.get_status()
-        
-        return {
-            "status": "success",
-            "health_statuses": {
-                implementation: {
-                    "is_healthy": status.is_healthy,
-                    "error_rate": round(status.error_rate * 100, 2),
-                    "avg_response_time": round(status.avg_response_time, 3),
-                    "recent_errors": status.recent_errors,
-                    "issues": status.issues,
-                    "last_check": status.last_check.isoformat()
-                }
-                for implementation, status in health_statuses.items()
-            },
-            "monitor_status": monitor_status
-        }
+        return {"status": "success", **(await _health_status_snapshot())}
     except Exception as e:
         logger.error(f"獲取健康狀況失敗: {e}")
         raise HTTPException(status_code=500, detail=f"健康檢查失敗: {str(e)}")
@@ -1174,6 +1512,7 @@ async def update_health_thresholds(request: dict = Body(...)):
         success = health_monitor.update_thresholds(thresholds)
         
         if success:
+            _clear_monitor_snapshots()
             return {
                 "status": "success",
                 "message": "健康檢查閾值已更新",
@@ -1190,7 +1529,6 @@ async def update_health_thresholds(request: dict = Body(...)):
 @app.post("/api/dialogue/text", response_model=DialogueResponse)
 async def process_text_dialogue(
     request: Request,
-    background_tasks: BackgroundTasks,
     body: dict = Body(
         ...,  # Ellipsis 表示必填
         example={}
@@ -1200,7 +1538,6 @@ async def process_text_dialogue(
 
     Args:
         request: 原始請求對象
-        background_tasks: FastAPI 背景任務
 
     Returns:
         對話回應
@@ -1209,7 +1546,7 @@ async def process_text_dialogue(
         # 手動解析請求體
         logger.debug("開始處理文本對話請求")
         #body = await request.json()
-        logger.debug(f"解析後的請求體: {body}")
+        logger.debug("解析後的請求體: %s", body)
         
         # 創建請求模型
         text = body.get("text", "")
@@ -1217,14 +1554,14 @@ async def process_text_dialogue(
         session_id = body.get("session_id")
         character_config = body.get("character_config")  # 提取客戶端提供的角色配置
         
-        logger.debug(f"提取參數: text={text}, character_id={character_id}, session_id={session_id}, character_config={'提供' if character_config else '未提供'}")
+        logger.debug("提取參數: text=%s, character_id=%s, session_id=%s, character_config=%s", text, character_id, session_id, '提供' if character_config else '未提供')
         
         # 檢查 character_config 是否為字符串，若是則嘗試解析為字典
         if character_config and isinstance(character_config, str):
             try:
                 #logger.debug(f"\n\ncharacter_config:\n{character_config}\n\n")
                 logger.info("process_text_dialogue: character_config 是字符串，嘗試解析為 JSON")
-                character_config = json.loads(character_config)
+                character_config = _parse_character_config(character_config)
                 logger.info("process_text_dialogue: 成功將 character_config 字符串解析為字典")
             except json.JSONDecodeError as e:
                 logger.error(f"process_text_dialogue: 解析 character_config 字符串失敗: {e}")
@@ -1236,41 +1573,38 @@ async def process_text_dialogue(
         if not character_id:
             raise HTTPException(status_code=400, detail="必須提供 character_id 參數")
         
+        session = session_store.get(session_id) if session_id else None
         # 臨時解決方案：如果提供了 session_id 但不在 session_store 中，返回錯誤
-        if session_id and session_id not in session_store:
+        if session_id and session is None:
             raise HTTPException(status_code=404, detail="找不到指定的會話，請創建新會話")
         
         # 如果有會話 ID，使用現有會話
-        if session_id and session_id in session_store:
-            session = session_store[session_id]
+        if session is not None:
             # 更新會話活動時間
-            session["last_activity"] = asyncio.get_event_loop().time()
+            session.last_activity = time.monotonic()
         else:
             # 創建新會話 - 使用 get_or_create_session 處理 character_config
             try:
                 logger.debug("嘗試創建新會話")
-                session = await get_or_create_session(
+                session_id, session = await get_or_create_session(
                     request=request,
                     character_id=character_id,
                     character_config=character_config
                 )
-                session_id = next(key for key, value in session_store.items() if value is session)
-                logger.debug(f"成功創建新會話，ID: {session_id}")
+                logger.debug("成功創建新會話，ID: %s", session_id)
             except Exception as e:
                 logger.error(f"創建會話時出錯: {e}", exc_info=True)
-                # 記錄詳細的堆疊跟踪
-                logger.error(f"詳細錯誤堆疊: {traceback.format_exc()}")
                 raise HTTPException(
                     status_code=500,
                     detail=f"創建會話失敗: {str(e)}"
                 )
         
         # 在調用對話管理器前添加診斷信息
-        logger.debug(f"使用的角色信息: id={character_id}, name={session['dialogue_manager'].character.name}")
+        logger.debug("使用的角色信息: id=%s, name=%s", character_id, session.dialogue_manager.character.name)
         
         # Phase 5: 性能監控 - 開始請求追蹤
-        performance_monitor = get_performance_monitor()
-        implementation_version = session.get("implementation_version", "unknown")
+        performance_monitor = _request_monitor()
+        implementation_version = session.implementation_version
         monitoring_context = performance_monitor.start_request(
             implementation=implementation_version,
             endpoint="text_dialogue",
@@ -1280,12 +1614,12 @@ async def process_text_dialogue(
         
         try:
             # 調用對話管理器處理用戶輸入
-            dialogue_manager = session["dialogue_manager"]
-            logger.debug(f"調用對話管理器處理: '{text}' (實現版本: {implementation_version})")
+            dialogue_manager = session.dialogue_manager
+            logger.debug("調用對話管理器處理: '%s' (實現版本: %s)", text, implementation_version)
             
             # 直接使用對話管理器處理
             response_json = await dialogue_manager.process_turn(text)
-            logger.debug(f"對話管理器返回結果: {response_json}")
+            logger.debug("對話管理器返回結果: %s", response_json)
 
             if hasattr(dialogue_manager, "clear_pending_turn"):
                 dialogue_manager.clear_pending_turn()
@@ -1310,13 +1644,11 @@ async def process_text_dialogue(
             performance_metrics = performance_monitor.end_request(
                 context=monitoring_context,
                 success=True,
-                response_length=len(str(response_json))
+                response_length=_response_length(response_json)
             )
             
         except Exception as e:
             logger.error(f"對話管理器處理輸入時出錯: {e}", exc_info=True)
-            # 記錄詳細的堆疊跟踪
-            logger.error(f"詳細錯誤堆疊: {traceback.format_exc()}")
             
             # Phase 5: 性能監控 - 記錄失敗
             performance_monitor.end_request(
@@ -1330,9 +1662,6 @@ async def process_text_dialogue(
                 detail=f"對話處理失敗: {str(e)}"
             )
         
-        # 排程清理舊會話
-        background_tasks.add_task(cleanup_old_sessions, background_tasks)
-        
         # 使用輔助函數格式化回應
         try:
             response = await format_dialogue_response(
@@ -1340,36 +1669,33 @@ async def process_text_dialogue(
                 session_id=session_id,
                 session=session,
                 performance_metrics=performance_metrics,  # Phase 5: 傳遞性能指標
-                dialogue_manager=dialogue_manager  # 傳遞對話管理器以獲取優化統計
+                dialogue_manager=dialogue_manager,  # 傳遞對話管理器以獲取優化統計
+                parsed_response=extracted["response_dict"],  # 沿用候選抽取時的解析結果
             )
             if pending_turn:
                 response = _attach_pending_selection_metadata(response, pending_turn)
-            logger.debug(f"返回回應: {response} (版本: {implementation_version})")
+            logger.debug("返回回應: %s (版本: %s)", response, implementation_version)
         except Exception as e:
             logger.error(f"格式化回應時出錯: {e}", exc_info=True)
-            # 記錄詳細的堆疊跟踪
-            logger.error(f"詳細錯誤堆疊: {traceback.format_exc()}")
             raise HTTPException(
                 status_code=500,
                 detail=f"格式化回應失敗: {str(e)}"
             )
         
         # 直接返回文本回應
-        return response
+        return ORJSONResponse(response)
         
     except json.JSONDecodeError as e:
-        logger.error(f"JSON 解析錯誤: {e}")
-        logger.error(f"詳細錯誤堆疊: {traceback.format_exc()}")
+        # 堆疊僅在 DEBUG 等級輸出；exc_info 交由 logging formatter 處理
+        logger.error(f"JSON 解析錯誤: {e}", exc_info=logger.isEnabledFor(logging.DEBUG))
         raise HTTPException(status_code=400, detail=f"無效的 JSON 格式: {str(e)}")
     except Exception as e:
         logger.error(f"處理文本對話請求時出錯: {e}", exc_info=True)
-        logger.error(f"詳細錯誤堆疊: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"處理請求時發生錯誤: {str(e)}")
 
 @app.post("/api/dialogue/audio", response_model=DialogueResponse)
 async def process_audio_dialogue(
     request: Request,
-    background_tasks: BackgroundTasks,
     audio_file: UploadFile = File(...),
     character_id: str = Form(...),
     session_id: Optional[str] = Form(None),
@@ -1380,7 +1706,6 @@ async def process_audio_dialogue(
 
     Args:
         request: 原始請求對象
-        background_tasks: FastAPI 背景任務
         audio_file: 上傳的音頻文件
         character_id: 角色ID
         session_id: 會話ID (可選)
@@ -1390,14 +1715,15 @@ async def process_audio_dialogue(
     Returns:
         待病患確認的完整句候選回應
     """
-    logger.debug(f"處理音頻對話請求: character_id={character_id}, session_id={session_id}, character_config_json={'提供' if character_config_json else '未提供'}")
+    logger.debug("處理音頻對話請求: character_id=%s, session_id=%s, character_config_json=%s", character_id, session_id, '提供' if character_config_json else '未提供')
     
     # 解析角色配置 JSON 字符串
     character_config = None
     if character_config_json:
         try:
-            character_config = json.loads(character_config_json)
-            logger.debug(f"已解析角色配置 JSON: {json.dumps(character_config, ensure_ascii=False, indent=2)}")
+            character_config = _parse_character_config(character_config_json)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("已解析角色配置 JSON: %s", json.dumps(character_config, ensure_ascii=False, indent=2))
         except json.JSONDecodeError as e:
             logger.error(f"角色配置 JSON 解析錯誤: {e}")
             # 不要直接中斷，嘗試使用原始字符串
@@ -1405,20 +1731,19 @@ async def process_audio_dialogue(
             character_config = character_config_json
     
     # 如果有會話 ID，使用現有會話
-    if session_id and session_id in session_store:
-        session = session_store[session_id]
+    session = session_store.get(session_id) if session_id else None
+    if session is not None:
         # 更新會話活動時間
-        session["last_activity"] = asyncio.get_event_loop().time()
+        session.last_activity = time.monotonic()
     else:
         # 創建新會話 - 使用 get_or_create_session 處理 character_config
         try:
-            session = await get_or_create_session(
+            session_id, session = await get_or_create_session(
                 request=request,
                 character_id=character_id,
                 character_config=character_config
             )
-            session_id = next(key for key, value in session_store.items() if value is session)
-            logger.debug(f"已創建新會話: {session_id}")
+            logger.debug("已創建新會話: %s", session_id)
         except Exception as e:
             logger.error(f"創建會話時出錯: {e}", exc_info=True)
             raise HTTPException(
@@ -1431,11 +1756,12 @@ async def process_audio_dialogue(
     _t_stt_start = time.time()
     text_result = await speech_to_text(
         audio_file,
-        dialogue_manager=session["dialogue_manager"],
+        dialogue_manager=session.dialogue_manager,
         session_id=session_id,
+        session=session,
     )
     _t_stt_end = time.time()
-    logger.debug(f"音頻識別結果: {text_result}")
+    logger.debug("音頻識別結果: %s", text_result)
 
     _t_resp_prep_start = time.time()
     # 處理返回結果（可能是字典或JSON字符串）
@@ -1455,7 +1781,7 @@ async def process_audio_dialogue(
                 "original": str(text_result),
                 "options": [str(text_result)]
             }
-            logger.debug(f"使用預設字典: {text_dict}")
+            logger.debug("使用預設字典: %s", text_dict)
     
     # 提取原始文本和選項（包含 self-annotation 欄位）
     raw_transcript = text_dict.get("raw_transcript", "")
@@ -1472,7 +1798,7 @@ async def process_audio_dialogue(
     logger.info(f"原始識別文本: '{original_text}'")
     logger.info(f"識別選項 ({len(options_list)}): {options_list}")
     
-    dialogue_manager = session["dialogue_manager"]
+    dialogue_manager = session.dialogue_manager
     if hasattr(dialogue_manager, "clear_pending_turn"):
         dialogue_manager.clear_pending_turn()
     pending_turn = _register_pending_turn(
@@ -1491,14 +1817,12 @@ async def process_audio_dialogue(
     )
     
     # 獲取實現版本信息
-    implementation_version = "optimized"
-    if session and "implementation_version" in session:
-        implementation_version = session["implementation_version"]
+    implementation_version = session.implementation_version
     
     # 創建基本的性能指標（音頻識別過程中的指標）
     audio_metrics = None
-    if session and session.get("last_performance_metrics"):
-        last_metrics = session["last_performance_metrics"]
+    if session and session.last_performance_metrics:
+        last_metrics = session.last_performance_metrics
         audio_metrics = {
             "response_time": round(last_metrics.duration, 3) if hasattr(last_metrics, 'duration') else 0,
             "timestamp": last_metrics.timestamp.isoformat() if hasattr(last_metrics, 'timestamp') else datetime.now().isoformat(),
@@ -1507,7 +1831,7 @@ async def process_audio_dialogue(
         }
     
     # 創建回應
-    response = DialogueResponse(
+    response = _dialogue_response_dict(
         status="success",
         responses=["請從以下選項中選擇您想表達的內容:"],
         state="WAITING_SELECTION",
@@ -1519,7 +1843,7 @@ async def process_audio_dialogue(
         keyword_completion=keyword_completion or None,
         implementation_version=implementation_version,
         performance_metrics=audio_metrics,
-        logs=session.get("logs") if session else None,
+        logs=session.logs if session else None,
     )
     response = _attach_pending_selection_metadata(response, pending_turn)
 
@@ -1533,9 +1857,9 @@ async def process_audio_dialogue(
     }
     if _stt_timings:
         _timing_breakdown["stt_detail"] = _stt_timings
-    if response.performance_metrics is None:
-        response.performance_metrics = {}
-    response.performance_metrics["timing_breakdown"] = _timing_breakdown
+    if response["performance_metrics"] is None:
+        response["performance_metrics"] = {}
+    response["performance_metrics"]["timing_breakdown"] = _timing_breakdown
     logger.info("[Timing] /api/dialogue/audio: %s", _timing_breakdown)
 
     # 保存病患補句候選到交互日誌（沿用 speech_recognition_options 相容欄位）
@@ -1547,100 +1871,87 @@ async def process_audio_dialogue(
         keyword_completion=keyword_completion
     )
     
-    # 排程清理舊會話
-    background_tasks.add_task(cleanup_old_sessions, background_tasks)
-    
-    logger.debug(f"返回語音識別選項: {response}")
+    logger.debug("返回語音識別選項: %s", response)
     
     # 直接返回文本回應
-    return response
+    return ORJSONResponse(response)
 
 @app.post("/api/dialogue/audio_input", response_model=DialogueResponse)
 async def process_audio_input_dialogue(
     request: Request,
-    background_tasks: BackgroundTasks,
     audio_file: UploadFile = File(...),
     character_id: str = Form(...),
     session_id: Optional[str] = Form(None),
     character_config_json: Optional[str] = Form(None), 
 ):
     """處理照護者/醫護語音輸入，轉錄後產生病患候選回應。"""
-    logger.debug(f"Processing audio input dialogue request (gemini): character_id={character_id}, session_id={session_id}, character_config_json={'provided' if character_config_json else 'not provided'}")
+    logger.debug("Processing audio input dialogue request (gemini): character_id=%s, session_id=%s, character_config_json=%s", character_id, session_id, 'provided' if character_config_json else 'not provided')
 
     # 解析角色配置 JSON
     character_config = None
     if character_config_json:
         try:
-            character_config = json.loads(character_config_json)
-            logger.debug(f"Parsed character_config_json: keys={list(character_config.keys()) if isinstance(character_config, dict) else 'N/A'}")
+            character_config = _parse_character_config(character_config_json)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Parsed character_config_json: keys=%s", list(character_config.keys()) if isinstance(character_config, dict) else 'N/A')
         except json.JSONDecodeError:
             logger.warning("Invalid character_config_json format, ignoring it")
             character_config = None
 
     # 會話管理
     try:
-        if session_id and session_id in session_store:
-            session = session_store[session_id]
-            session["last_activity"] = asyncio.get_event_loop().time()
+        session = session_store.get(session_id) if session_id else None
+        if session is not None:
+            session.last_activity = time.monotonic()
         else:
-            session_obj = await get_or_create_session(
+            session_id, session = await get_or_create_session(
                 request=request,
                 session_id=session_id,
                 character_id=character_id,
                 character_config=character_config
             )
-            # 取得新 session_id
-            if not session_id:
-                for sid, sdata in session_store.items():
-                    if sdata is session_obj:
-                        session_id = sid
-                        break
-            session = session_obj
     except Exception as e:
         logger.error(f"Session management error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Session error: {str(e)}")
 
-    # 保存音頻到臨時檔
+    # 讀取上傳音頻至記憶體（直接以 inline bytes 送交 Gemini，不寫暫存檔）
     _t_req_start = time.time()
     _t_audio_save_start = time.time()
-    temp_audio_file_path: Optional[str] = None
     try:
         # 從文件名獲取擴展名
-        file_ext = os.path.splitext(audio_file.filename)[1].lower()
+        file_ext = os.path.splitext(audio_file.filename or "")[1].lower()
         if not file_ext:
             file_ext = '.wav'  # 默認擴展名
-
-        # 使用原始擴展名創建臨時文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_audio_file:
-            content = await audio_file.read()
-            tmp_audio_file.write(content)
-            temp_audio_file_path = tmp_audio_file.name
-        logger.debug(f"Saved temp audio file: {temp_audio_file_path} (format: {file_ext})")
+        audio_mime_type = get_audio_mime_type(f"upload{file_ext}") or "audio/wav"
+        audio_bytes = await _read_upload_bytes(audio_file)
+        logger.debug("Read uploaded audio: %s bytes (format: %s, mime: %s)", len(audio_bytes), file_ext, audio_mime_type)
     except Exception as e:
-        logger.error(f"Failed saving uploaded audio: {e}", exc_info=True)
-        raise HTTPException(status_code=400, detail=f"Failed to save audio file: {str(e)}")
+        logger.error(f"Failed reading uploaded audio: {e}", exc_info=True)
+        raise HTTPException(status_code=400, detail=f"Failed to read audio file: {str(e)}")
     _t_audio_save_end = time.time()
 
     # Gemini 轉錄
     _t_transcription_start = time.time()
     try:
-        from ..llm.gemini_client import GeminiClient
-
-        gemini_client = GeminiClient()
+        gemini_client = _get_gemini_client()
 
         # 嘗試從 session 中獲取上下文以增強識別準確度
-        dm = session.get("dialogue_manager") if session else None
+        dm = session.dialogue_manager if session else None
         character_obj = getattr(dm, 'character', None) if dm else None
         history_list = getattr(dm, 'conversation_history', None) if dm else None
 
-        transcription_json = gemini_client.transcribe_audio(
-            temp_audio_file_path,
+        # 轉錄在工作執行緒中執行，不阻塞事件迴圈；歷史先取快照，避免執行期間被其他請求修改
+        transcription_json, audio_meta = await asyncio.to_thread(
+            gemini_client.transcribe_audio_bytes,
+            audio_bytes,
+            audio_mime_type,
             character=character_obj,
-            conversation_history=history_list,
+            conversation_history=list(history_list) if history_list is not None else None,
             session_id=session_id,
             option_count=0,
             transcription_only=True,
         )
+        gemini_audio_timings = audio_meta["timings"]
         try:
             transcription = json.loads(transcription_json)
         except json.JSONDecodeError:
@@ -1659,8 +1970,8 @@ async def process_audio_input_dialogue(
     _t_transcription_end = time.time()
 
     # Phase 5: 音頻對話性能監控
-    performance_monitor = get_performance_monitor()
-    implementation_version = session.get("implementation_version", "unknown")
+    performance_monitor = _request_monitor()
+    implementation_version = session.implementation_version
     monitoring_context = performance_monitor.start_request(
         implementation=implementation_version,
         endpoint="audio_dialogue",
@@ -1671,7 +1982,7 @@ async def process_audio_input_dialogue(
     # Dialogue processing
     _t_dialogue_start = time.time()
     try:
-        dialogue_manager = session["dialogue_manager"]
+        dialogue_manager = session.dialogue_manager
         response_json = await dialogue_manager.process_turn(text_input)
 
         if hasattr(dialogue_manager, "clear_pending_turn"):
@@ -1698,7 +2009,7 @@ async def process_audio_input_dialogue(
         performance_metrics = performance_monitor.end_request(
             context=monitoring_context,
             success=True,
-            response_length=len(str(response_json))
+            response_length=_response_length(response_json)
         )
 
     except Exception as e:
@@ -1722,15 +2033,16 @@ async def process_audio_input_dialogue(
             session_id=session_id,
             session=session,
             performance_metrics=performance_metrics,  # Phase 5: 傳遞性能指標
-            dialogue_manager=dialogue_manager  # 傳遞對話管理器以獲取優化統計
+            dialogue_manager=dialogue_manager,  # 傳遞對話管理器以獲取優化統計
+            parsed_response=extracted["response_dict"],  # 沿用候選抽取時的解析結果
         )
         if pending_turn:
             formatted_response = _attach_pending_selection_metadata(formatted_response, pending_turn)
         # 保留轉錄候選給前端參考；正式流程仍由病患從 responses 中選一句再送回 select_response
         if options:
-            formatted_response.speech_recognition_options = options
+            formatted_response["speech_recognition_options"] = options
         # 加入原始轉錄文本
-        formatted_response.original_transcription = original_text or None
+        formatted_response["original_transcription"] = original_text or None
 
         _t_formatting_end = time.time()
         _t_req_end = time.time()
@@ -1741,29 +2053,20 @@ async def process_audio_input_dialogue(
             "dialogue_s": round(_t_dialogue_end - _t_dialogue_start, 4),
             "formatting_s": round(_t_formatting_end - _t_formatting_start, 4),
         }
-        _gemini_sub = getattr(gemini_client, '_last_audio_timings', None)
-        if _gemini_sub:
-            _timing_breakdown["transcription_detail"] = _gemini_sub
+        if gemini_audio_timings:
+            _timing_breakdown["transcription_detail"] = gemini_audio_timings
         _turn_timings = getattr(dialogue_manager, '_last_turn_timings', None)
         if _turn_timings:
             _timing_breakdown["dialogue_detail"] = _turn_timings
-        if formatted_response.performance_metrics is None:
-            formatted_response.performance_metrics = {}
-        formatted_response.performance_metrics["timing_breakdown"] = _timing_breakdown
+        if formatted_response["performance_metrics"] is None:
+            formatted_response["performance_metrics"] = {}
+        formatted_response["performance_metrics"]["timing_breakdown"] = _timing_breakdown
         logger.info("[Timing] /api/dialogue/audio_input: %s", _timing_breakdown)
 
-        background_tasks.add_task(cleanup_old_sessions, background_tasks)
-        return formatted_response
+        return ORJSONResponse(formatted_response)
     except Exception as e:
         logger.error(f"Formatting response failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Formatting error: {str(e)}")
-    finally:
-        if temp_audio_file_path and os.path.exists(temp_audio_file_path):
-            try:
-                os.remove(temp_audio_file_path)
-                logger.debug(f"Deleted temp audio file: {temp_audio_file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to delete temp audio file {temp_audio_file_path}: {e}")
 
 @app.post("/api/dialogue/select_response")
 async def select_response(request: SelectResponseRequest):
@@ -1776,21 +2079,19 @@ async def select_response(request: SelectResponseRequest):
         選擇提交結果；不會在此端點觸發新一輪 LLM 生成
     """
     _t_start = time.time()
-    logger.debug(f"處理選擇回應請求: session_id={request.session_id}, selected_response='{request.selected_response}'")
+    logger.debug("處理選擇回應請求: session_id=%s, selected_response='%s'", request.session_id, request.selected_response)
     
-    # 檢查會話是否存在
-    if request.session_id not in session_store:
+    # 獲取會話（單次查詢同時判斷是否存在）
+    session = session_store.get(request.session_id)
+    if session is None:
         logger.error(f"找不到指定的會話: {request.session_id}")
         raise HTTPException(status_code=404, detail="找不到指定的會話")
     
-    # 獲取會話
-    session = session_store[request.session_id]
-    
     # 更新會話活動時間
-    session["last_activity"] = asyncio.get_event_loop().time()
+    session.last_activity = time.monotonic()
     
     try:
-        dialogue_manager = session["dialogue_manager"]
+        dialogue_manager = session.dialogue_manager
         pending_turn = (
             dialogue_manager.get_pending_turn()
             if hasattr(dialogue_manager, "get_pending_turn")
@@ -1799,9 +2100,9 @@ async def select_response(request: SelectResponseRequest):
         if pending_turn is None:
             raise HTTPException(status_code=409, detail="當前會話沒有待確認的病患選項")
 
-        performance_monitor = get_performance_monitor()
-        implementation_version = session.get("implementation_version", "unknown")
-        character_id = session.get("character_id", "unknown")
+        performance_monitor = _request_monitor()
+        implementation_version = session.implementation_version
+        character_id = session.character_id
         monitoring_context = performance_monitor.start_request(
             implementation=implementation_version,
             endpoint="select_response",
@@ -1818,9 +2119,6 @@ async def select_response(request: SelectResponseRequest):
             )
             raise HTTPException(status_code=400, detail="selected_response 不可為空")
 
-        candidate_options = pending_turn.get("candidate_options") or []
-        selection_source = "candidate" if normalized_selected in candidate_options else "custom"
-
         try:
             committed_turn = dialogue_manager.commit_pending_turn(
                 normalized_selected,
@@ -1833,6 +2131,8 @@ async def select_response(request: SelectResponseRequest):
                 error_message=str(validation_error),
             )
             raise HTTPException(status_code=400, detail=str(validation_error))
+        # commit_pending_turn 已判斷過是否為候選句，直接沿用其結果
+        selection_source = committed_turn["metadata"]["selection_source"]
 
         # 記錄選擇的回應
         dialogue_manager.log_interaction(
@@ -1855,11 +2155,13 @@ async def select_response(request: SelectResponseRequest):
             'path': 'selection_commit',
             'llm_call': False,
         })
-        metrics_dict = {
-            "response_time": round(performance_metrics.duration, 3),
-            "timestamp": performance_metrics.timestamp.isoformat(),
-            "success": performance_metrics.success,
-        }
+        metrics_dict = None
+        if performance_metrics is not None:
+            metrics_dict = {
+                "response_time": round(performance_metrics.duration, 3),
+                "timestamp": performance_metrics.timestamp.isoformat(),
+                "success": performance_metrics.success,
+            }
         return {
             "status": "success",
             "message": "回應選擇已記錄",
@@ -1890,5 +2192,13 @@ if __name__ == "__main__":
     session_store.clear()
     logger.info("已清理角色和會話緩存，啟動服務器...")
     
+    # 有安裝 uvloop（非 Windows）時使用 libuv 事件迴圈，否則回退標準 asyncio
+    try:
+        import uvloop  # noqa: F401
+        loop_impl = "uvloop"
+    except ImportError:
+        loop_impl = "asyncio"
+    logger.info(f"使用事件迴圈實作: {loop_impl}")
+
     # 啟動服務器
-    uvicorn.run("src.api.server:app", host="0.0.0.0", port=8000, reload=True) 
+    uvicorn.run("src.api.server:app", host="0.0.0.0", port=8000, reload=True, loop=loop_impl) 
@@ -1,7 +1,8 @@
 """Audio prompt utilities for DSPy integration."""
 
 import logging
-from typing import List, Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional
 
 from ..character import Character
 from ..scenario_manager import get_scenario_manager
@@ -15,12 +16,27 @@ DEFAULT_AUDIO_CONTEXT_PRIORITY = [
     ("vital_signs_examples", "生命徵象相關"),
 ]
 
+# fallback 情境列表於載入時預先組好，索引即 max_items
+_PRECOMPUTED_CONTEXTS = [
+    "\n".join(f"- {label}: {desc}" for label, desc in DEFAULT_AUDIO_CONTEXT_PRIORITY[:k])
+    for k in range(len(DEFAULT_AUDIO_CONTEXT_PRIORITY) + 1)
+]
+
+
+# 系統行前綴（'[系統]' 已由 '[' 涵蓋）
+_SYSTEM_PREFIXES = ('[', '(系統)')
+
 
 def _is_system_line(line: str) -> bool:
     if not isinstance(line, str):
         return True
-    s = line.strip()
-    return s.startswith('[') or s.startswith('(系統)') or s.startswith('[系統]')
+    # 多數對話行以說話者名稱開頭，看第一個字元即可排除，不必 strip
+    first = line[:1]
+    if first == '[':
+        return True
+    if first != '(' and not first.isspace():
+        return False
+    return line.lstrip().startswith(_SYSTEM_PREFIXES)
 
 
 def format_history_for_audio(
@@ -30,20 +46,55 @@ def format_history_for_audio(
     max_lines: int = 20,
 ) -> str:
     """Return trimmed history with persona reminder."""
-    persona = character_persona or "病患"
-    name = character_name or "病患"
-    reminder = f"[角色提醒] 您是 {name}，{persona}。請維持角色設定。"
-
     if not conversation_history:
-        return reminder
+        return render_history_for_audio([], character_name, character_persona, max_lines)
+    if max_lines <= 0:
+        return render_history_for_audio(
+            filter_history_lines(conversation_history),
+            character_name,
+            character_persona,
+            max_lines,
+        )
+
+    # 從尾端反向掃描，收滿 max_lines 行即停止，不必過濾整段歷史
+    recent: List[str] = []
+    for entry in reversed(conversation_history):
+        if isinstance(entry, str) and not _is_system_line(entry):
+            trimmed = entry.strip()
+            if trimmed:
+                recent.append(trimmed)
+                if len(recent) >= max_lines:
+                    break
+    recent.reverse()
+    return render_history_for_audio(recent, character_name, character_persona, max_lines)
+
 
+def filter_history_lines(entries: Iterable[str]) -> List[str]:
+    """Drop system/non-string entries and return stripped, non-empty lines."""
     history: List[str] = []
-    for entry in conversation_history:
+    for entry in entries:
         if isinstance(entry, str) and not _is_system_line(entry):
             trimmed = entry.strip()
             if trimmed:
                 history.append(trimmed)
-    recent = history[-max_lines:]
+    return history
+
+
+@lru_cache(maxsize=256)
+def _persona_reminder(name: str, persona: str) -> str:
+    return f"[角色提醒] 您是 {name}，{persona}。請維持角色設定。"
+
+
+def render_history_for_audio(
+    history_lines: List[str],
+    character_name: Optional[str],
+    character_persona: Optional[str],
+    max_lines: int = 20,
+) -> str:
+    """Render already-filtered history lines with persona reminder."""
+    reminder = _persona_reminder(character_name or "病患", character_persona or "病患")
+
+    recent = history_lines[-max_lines:]
     if recent:
         return f"{reminder}\n" + "\n".join(recent)
     return reminder
@@ -65,48 +116,72 @@ def build_available_audio_contexts(
         格式化的情境列表字串
     """
     try:
-        scenario_manager = get_scenario_manager()
-        available = list(scenario_manager.scenarios.keys())
+        return _build_scenario_contexts(get_scenario_manager(), previous_context, previous_speaker, max_items)
+    except Exception as e:
+        logger.warning(f"ScenarioManager 載入失敗，使用 fallback: {e}")
+        # Fallback to original behavior
+        return _PRECOMPUTED_CONTEXTS[max(0, min(max_items, len(_PRECOMPUTED_CONTEXTS) - 1))]
 
-        if not available:
-            raise ValueError("No scenarios loaded")
 
-        prioritized: List[str] = []
+@lru_cache(maxsize=256)
+def _build_scenario_contexts(
+    scenario_manager,
+    previous_context: Optional[str],
+    previous_speaker: Optional[str],
+    max_items: int,
+) -> str:
+    """依 ScenarioManager 內容組出情境列表；情境於管理器建立時載入後不再變動，故依參數快取
 
-        # 1. 若有上一輪情境，優先列出
-        if previous_context and previous_context in available:
-            prioritized.append(previous_context)
+    快取鍵包含管理器實例本身，換成新的 ScenarioManager 時自然不會命中舊結果。
+    """
+    available = list(scenario_manager.scenarios.keys())
 
-        # 2. 若有上一輪 speaker，找出該 speaker 相關的情境
-        if previous_speaker and previous_speaker in scenario_manager.speaker_index:
-            speaker_scenarios = scenario_manager.speaker_index[previous_speaker]
-            for ctx in speaker_scenarios:
-                if ctx not in prioritized:
-                    prioritized.append(ctx)
-                if len(prioritized) >= max_items:
-                    break
+    if not available:
+        raise ValueError("No scenarios loaded")
 
-        # 3. 補充其他情境
-        for ctx in available:
+    prioritized: List[str] = []
+
+    # 1. 若有上一輪情境，優先列出
+    if previous_context and previous_context in available:
+        prioritized.append(previous_context)
+
+    # 2. 若有上一輪 speaker，找出該 speaker 相關的情境
+    if previous_speaker and previous_speaker in scenario_manager.speaker_index:
+        speaker_scenarios = scenario_manager.speaker_index[previous_speaker]
+        for ctx in speaker_scenarios:
             if ctx not in prioritized:
                 prioritized.append(ctx)
             if len(prioritized) >= max_items:
                 break
 
-        lines = [f"- {ctx}" for ctx in prioritized[:max_items]]
-        return "\n".join(lines)
+    # 3. 補充其他情境
+    for ctx in available:
+        if ctx not in prioritized:
+            prioritized.append(ctx)
+        if len(prioritized) >= max_items:
+            break
 
-    except Exception as e:
-        logger.warning(f"ScenarioManager 載入失敗，使用 fallback: {e}")
-        # Fallback to original behavior
-        lines = [f"- {label}: {desc}" for label, desc in DEFAULT_AUDIO_CONTEXT_PRIORITY[:max_items]]
-        return "\n".join(lines)
+    lines = [f"- {ctx}" for ctx in prioritized[:max_items]]
+    return "\n".join(lines)
 
 
 def summarize_character(character: Optional[Character]) -> str:
     if character is None:
         return ""
 
+    # 同一角色的摘要不會變動，計算一次後快取在角色物件上
+    cached = getattr(character, '_summary_cache', None)
+    if cached is not None:
+        return cached
+    summary = _build_character_summary(character)
+    try:
+        character._summary_cache = summary
+    except AttributeError:
+        pass
+    return summary
+
+
+def _build_character_summary(character: Character) -> str:
     parts: List[str] = []
     fixed = {}
     floating = {}
@@ -130,15 +205,13 @@ def summarize_character(character: Optional[Character]) -> str:
     treatment_stage = floating.get('目前治療階段') or floating.get('治療階段')
     treatment_status = floating.get('目前治療狀態')
     if treatment_stage or treatment_status:
-        text = "目前治療階段: "
-        if treatment_stage:
-            text += treatment_stage
-        if treatment_status and treatment_status != treatment_stage:
-            if treatment_stage:
-                text += "；狀態: "
-            else:
-                text += treatment_status
-        parts.append(text)
+        extra_status = treatment_status if treatment_status != treatment_stage else None
+        parts.append("".join(filter(None, (
+            "目前治療階段: ",
+            treatment_stage,
+            "；狀態: " if treatment_stage and extra_status else None,
+            extra_status,
+        ))))
 
     current_status = floating.get('個案現況')
     if isinstance(current_status, str) and current_status and len(current_status) <= 120:
@@ -154,6 +227,7 @@ def summarize_character(character: Optional[Character]) -> str:
     return " | ".join(p.strip() for p in parts if p)
 
 
+@lru_cache(maxsize=16)
 def build_audio_template_rules(option_count: int) -> str:
     """Return a concise runtime rule string for audio tasks.
 
@@ -176,6 +250,8 @@ def build_audio_template_rules(option_count: int) -> str:
 
 __all__ = [
     'format_history_for_audio',
+    'filter_history_lines',
+    'render_history_for_audio',
     'build_available_audio_contexts',
     'summarize_character',
     'build_audio_template_rules',
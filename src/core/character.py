@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 import logging
 
@@ -10,36 +10,31 @@ class Character:
     backstory: str
     goal: str
     details: Optional[Dict[str, Any]] = None
+    # summarize_character 的快取結果；修改上述欄位後請呼叫 invalidate_summary()
+    _summary_cache: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def invalidate_summary(self) -> None:
+        """清除角色摘要快取（persona / goal / details 等欄位變更後呼叫）"""
+        self._summary_cache = None
 
     @classmethod
     def from_yaml(cls, character_data: Dict[str, Any]) -> 'Character':
         """從 YAML 資料建立 Character 物件"""
         logger = logging.getLogger("character")
         
-        logger.debug(f"嘗試從配置創建角色，數據類型: {type(character_data)}")
-        logger.debug(f"配置內容: {character_data}")
-        
-        for key, value in character_data.items():
-            logger.debug(f"配置項: {key} = {value} (類型: {type(value)})")
-        
-        # 創建標準化的參數字典
-        params = {
-            "name": character_data.get('name'),
-            "persona": character_data.get('persona'),
-            "backstory": character_data.get('backstory'),
-            "goal": character_data.get('goal'),
-            "details": character_data.get('details')
-        }
-        
-        logger.debug(f"標準化參數: {params}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("嘗試從配置創建角色，數據類型: %s", type(character_data))
+            logger.debug("配置內容: %s", character_data)
+            for key, value in character_data.items():
+                logger.debug("配置項: %s = %s (類型: %s)", key, value, type(value))
         
         try:
             return cls(
-                name=params["name"],
-                persona=params["persona"],
-                backstory=params["backstory"],
-                goal=params["goal"],
-                details=params["details"]
+                name=character_data.get('name'),
+                persona=character_data.get('persona'),
+                backstory=character_data.get('backstory'),
+                goal=character_data.get('goal'),
+                details=character_data.get('details')
             )
         except Exception as e:
             logger.error(f"創建角色失敗: {e}", exc_info=True)
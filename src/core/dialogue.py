@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 import datetime
-import json
 import logging
 import os
 import uuid
 from typing import Any, Dict, List, Optional, Union
 
+import orjson
+
 from .character import Character
 from .state import DialogueState
 
+# 已確認存在的日誌目錄；每個會話都會建立 DialogueManager，避免重複 makedirs 系統呼叫
+_ENSURED_LOG_DIRS: set = set()
+
 
 class DialogueManager:
     """Minimal dialogue manager base class.
@@ -29,37 +33,53 @@ class DialogueManager:
         self.current_state = DialogueState.NORMAL
         self.conversation_history: List[str] = []
         self.structured_history: List[Dict[str, Any]] = []
+        # 歷史每次新增/改寫即遞增版本；提示用的視窗渲染結果依版本快取
+        self._history_version = 0
+        self._history_window_cache: Optional[tuple] = None
         self.pending_turn: Optional[Dict[str, Any]] = None
         self.use_terminal = use_terminal
-        self.interaction_log: List[dict] = []
+        # 已序列化但尚未寫檔的 JSONL；log_interaction 直接寫入，累積到門檻或強制時才開檔寫入一次
+        self._log_buffer = bytearray()
+        self._log_flush_threshold = 8192
         self.log_dir = log_dir
+        # 提示歷史視窗大小：建立時讀取一次設定，避免每回合重新查詢
+        self._max_history_entries = self._load_max_history_entries()
 
-        os.makedirs(self.log_dir, exist_ok=True)
+        if self.log_dir not in _ENSURED_LOG_DIRS:
+            os.makedirs(self.log_dir, exist_ok=True)
+            _ENSURED_LOG_DIRS.add(self.log_dir)
 
+        mode = "terminal" if self.use_terminal else "gui"
         if log_file_basename:
-            mode = "terminal" if self.use_terminal else "gui"
             self.log_filename = f"{log_file_basename}_chat_{mode}.log"
         else:
-            today_date_str = datetime.datetime.now().strftime("%Y%m%d")
-            mode = "terminal" if self.use_terminal else "gui"
+            today_date_str = datetime.date.today().strftime("%Y%m%d")
             self.log_filename = f"{today_date_str}_patient_{self.character.name}_chat_{mode}.log"
 
         self.log_filepath = os.path.join(self.log_dir, self.log_filename)
         self.logger = logging.getLogger(__name__)
 
-    def _format_conversation_history(self) -> List[str]:
-        max_entries = 20
+    @staticmethod
+    def _load_max_history_entries() -> int:
         try:
             from .dspy.config import get_config
 
             dspy_cfg = get_config().get_dspy_config()
-            max_entries = int(dspy_cfg.get("max_history_entries", 20) or 20)
+            return int(dspy_cfg.get("max_history_entries", 20) or 20)
         except Exception:
-            max_entries = 20
+            return 20
+
+    def _format_conversation_history(self) -> List[str]:
+        max_entries = self._max_history_entries
         self._sync_structured_history_from_legacy()
         if self.structured_history:
-            rendered = [self._render_legacy_line(turn) for turn in self.structured_history]
-            return rendered[-max_entries:]
+            # 只渲染視窗內的輪次，讓每回合的成本不隨會話長度增長；歷史未變動時沿用上次結果
+            key = (self._history_version, len(self.structured_history))
+            cached = self._history_window_cache
+            if cached is None or cached[0] != key:
+                cached = (key, [self._render_legacy_line(turn) for turn in self.structured_history[-max_entries:]])
+                self._history_window_cache = cached
+            return list(cached[1])
         return self.conversation_history[-max_entries:]
 
     def _speaker_label(self, speaker_role: str, speaker_name: Optional[str] = None) -> str:
@@ -131,6 +151,7 @@ class DialogueManager:
 
         for line in self.conversation_history[structured_len:]:
             self.structured_history.append(self._parse_legacy_line(line))
+        self._history_version += 1
 
     def _rebuild_conversation_history(self) -> None:
         self.conversation_history = [self._render_legacy_line(turn) for turn in self.structured_history]
@@ -160,6 +181,7 @@ class DialogueManager:
         }
         self.structured_history.append(turn)
         self.conversation_history.append(self._render_legacy_line(turn))
+        self._history_version += 1
         return turn
 
     def replace_last_confirmed_turn(
@@ -181,6 +203,7 @@ class DialogueManager:
             turn["text"] = normalized_text
             if speaker_name:
                 turn["speaker_name"] = speaker_name
+            self._history_version += 1
             self._rebuild_conversation_history()
             return turn
         return None
@@ -248,8 +271,8 @@ class DialogueManager:
             metadata={
                 "source_text": pending_turn.get("source_text", ""),
                 "selection_kind": pending_turn.get("selection_kind", ""),
-                "selection_source": "candidate" if is_candidate else "custom",
                 **(pending_turn.get("metadata") or {}),
+                "selection_source": "candidate" if is_candidate else "custom",
             },
         )
         self.clear_pending_turn()
@@ -274,18 +297,19 @@ class DialogueManager:
             "raw_transcript": raw_transcript,
             "keyword_completion": keyword_completion,
         }
-        self.interaction_log.append(log_entry)
+        self._log_buffer += orjson.dumps(log_entry, option=orjson.OPT_APPEND_NEWLINE)
 
-    def save_interaction_log(self):
-        if not self.interaction_log:
+    def save_interaction_log(self, force: bool = False):
+        """緩衝區累積超過門檻或 force=True 時才將互動記錄寫入檔案"""
+        if not self._log_buffer:
+            return
+        if not force and len(self._log_buffer) < self._log_flush_threshold:
             return
 
         try:
-            with open(self.log_filepath, "a", encoding="utf-8") as file:
-                for entry in self.interaction_log:
-                    json.dump(entry, file, ensure_ascii=False)
-                    file.write("\n")
-            self.interaction_log = []
+            with open(self.log_filepath, "ab") as file:
+                file.write(self._log_buffer)
+            self._log_buffer = bytearray()
         except Exception:
             self.logger.exception("Failed to save interaction log: %s", self.log_filepath)
 
@@ -293,4 +317,4 @@ class DialogueManager:
         raise NotImplementedError("DialogueManager.process_turn must be implemented by subclasses.")
 
     def cleanup(self):
-        self.save_interaction_log()
+        self.save_interaction_log(force=True)
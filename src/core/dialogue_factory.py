@@ -7,11 +7,25 @@
 """
 
 import logging
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
 from .character import Character
 from .dialogue import DialogueManager
 
+logger = logging.getLogger(__name__)
+
+# get_available_implementations 的結果快取（實作清單於行程內不會變動）
+_impls_cache: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+@lru_cache(maxsize=1)
+def _optimized_manager_cls():
+    """延遲載入 OptimizedDialogueManagerDSPy（DSPy 依賴較重），載入後快取類別"""
+    from .dspy.optimized_dialogue_manager import OptimizedDialogueManagerDSPy
+
+    return OptimizedDialogueManagerDSPy
+
 
 def create_dialogue_manager(character: Character, 
                            use_terminal: bool = False, 
@@ -33,7 +47,6 @@ def create_dialogue_manager(character: Character,
         ImportError: 當請求的實現無法導入時
         ValueError: 當 force_implementation 參數無效時
     """
-    logger = logging.getLogger(__name__)
     
     # 記錄工廠函數調用
     logger.info(f"Creating dialogue manager: character={character.name}, "
@@ -51,11 +64,7 @@ def _create_optimized_dspy_manager(character: Character,
                                   log_dir: str,
                                   log_file_basename: Optional[str] = None) -> DialogueManager:
     """創建優化版 DSPy 對話管理器（統一模組，節省 66.7% API 調用）"""
-    logger = logging.getLogger(__name__)
-    
-    from .dspy.optimized_dialogue_manager import OptimizedDialogueManagerDSPy
-
-    manager = OptimizedDialogueManagerDSPy(character, use_terminal, log_dir, log_file_basename=log_file_basename)
+    manager = _optimized_manager_cls()(character, use_terminal, log_dir, log_file_basename=log_file_basename)
     logger.debug("Optimized DSPy DialogueManager created successfully")
     return manager
 
@@ -64,16 +73,28 @@ def get_available_implementations() -> Dict[str, Dict[str, Any]]:
     """獲取可用的對話管理器實現資訊
     
     Returns:
-        實現名稱到實現資訊的映射
+        實現名稱到實現資訊的映射（每次回傳副本，呼叫端可自由修改）
     """
-    logger = logging.getLogger(__name__)
+    global _impls_cache
+    if _impls_cache is None:
+        _impls_cache = _build_available_implementations()
+    return {name: dict(info) for name, info in _impls_cache.items()}
+
+
+def _invalidate_implementations_cache() -> None:
+    """清除實作清單快取（供測試使用）"""
+    global _impls_cache
+    _impls_cache = None
+
+
+def _build_available_implementations() -> Dict[str, Dict[str, Any]]:
+    """實際探測各實現是否可載入（僅於快取為空時執行）"""
     implementations: Dict[str, Dict[str, Any]] = {}
 
     try:
-        from .dspy.optimized_dialogue_manager import OptimizedDialogueManagerDSPy
         implementations["optimized"] = {
             "available": True,
-            "class": OptimizedDialogueManagerDSPy,
+            "class": _optimized_manager_cls(),
             "enabled": True,
             "description": "優化版 DSPy 對話管理器（統一模組，節省 66.7% API 調用）",
             "api_calls_per_conversation": 1,
@@ -125,7 +146,6 @@ def test_implementations() -> Dict[str, Dict[str, Any]]:
     Returns:
         實現名稱到測試結果的映射
     """
-    logger = logging.getLogger(__name__)
     results = {}
     
     # 創建測試角色
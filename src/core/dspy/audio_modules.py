@@ -3,37 +3,43 @@
 from __future__ import annotations
 
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import dspy
-import yaml
 
 from .signatures import AudioDisfluencyChatSignature
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=8)
+def _load_audio_system_body(path: str) -> str:
+    """依絕對路徑讀取一次音訊系統提示範本，所有 composer 實例共用解析結果"""
+    import yaml
+
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            data = yaml.safe_load(file) or {}
+        return data.get('audio_disfluency', '')
+    except FileNotFoundError:
+        logger.warning("Audio template not found: %s", path)
+        return ''
+
+
 class AudioPromptComposerModule(dspy.Module):
     """Assemble system/user prompts for audio disfluency tasks."""
 
     def __init__(self, template_path: Optional[Path] = None) -> None:
         super().__init__()
         self.template_path = template_path or Path("prompts/templates/audio_disfluency_template.yaml")
-        self._system_cached: Optional[str] = None
+        # 建立時解析一次絕對路徑，作為共用範本快取的鍵
+        self._template_key = str(self.template_path.resolve())
         self.signature = AudioDisfluencyChatSignature
 
     def _load_system_body(self) -> str:
-        if self._system_cached is not None:
-            return self._system_cached
-        try:
-            with self.template_path.open('r', encoding='utf-8') as file:
-                data = yaml.safe_load(file) or {}
-            self._system_cached = data.get('audio_disfluency', '')
-        except FileNotFoundError:
-            logger.warning("Audio template not found: %s", self.template_path)
-            self._system_cached = ''
-        return self._system_cached
+        return _load_audio_system_body(self._template_key)
 
     def forward(
         self,
@@ -48,24 +54,24 @@ class AudioPromptComposerModule(dspy.Module):
         system_body = self._load_system_body()
         system_prompt = system_body
 
-        user_sections = []
-        if character_profile:
-            user_sections.append(f"【角色摘要】\n{character_profile}")
-        if conversation_history:
-            user_sections.append(f"【近期對話】\n{conversation_history}")
-
+        labelled = [
+            ("【角色摘要】", character_profile),
+            ("【近期對話】", conversation_history),
+        ]
         if transcription_only:
-            user_sections.append("請僅輸出 {\"original\": \"...\"}，不需要其他欄位。")
+            closing = "請僅輸出 {\"original\": \"...\"}，不需要其他欄位。"
         else:
-            if available_contexts:
-                user_sections.append(f"【可用情境】\n{available_contexts}")
-            if template_rules:
-                user_sections.append(f"【輸出規則提醒】\n{template_rules}")
+            labelled += [
+                ("【可用情境】", available_contexts),
+                ("【輸出規則提醒】", template_rules),
+            ]
             if option_count > 0:
-                user_sections.append(f"請依規則輸出 {option_count} 個具體完整句子。")
+                closing = f"請依規則輸出 {option_count} 個具體完整句子。"
             else:
-                user_sections.append("本次僅需轉錄與關鍵詞補全，options 請輸出空陣列 []。")
-        user_prompt = "\n\n".join(section for section in user_sections if section)
+                closing = "本次僅需轉錄與關鍵詞補全，options 請輸出空陣列 []。"
+        user_prompt = "\n\n".join(
+            [f"{label}\n{value}" for label, value in labelled if value] + [closing]
+        )
 
         return dspy.Prediction(
             system_prompt=system_prompt,
@@ -105,12 +111,7 @@ class AudioDisfluencyPostModule:
         pass
 
     def _clean_fences(self, text: str) -> str:
-        s = (text or '').strip()
-        if s.startswith('```json'):
-            s = s[7:]
-        if s.endswith('```'):
-            s = s[:-3]
-        return s.strip()
+        return (text or '').strip().removeprefix('```json').removesuffix('```').strip()
 
     def normalize(
         self,
@@ -148,27 +149,29 @@ class AudioDisfluencyPostModule:
             }
             return {"normalized_json": json.dumps(payload, ensure_ascii=False)}
 
-        try:
-            obj = json.loads(cleaned)
-            if isinstance(obj, dict):
-                raw_transcript = obj.get('raw_transcript')
-                keyword_completion = obj.get('keyword_completion')
-                original = obj.get('original', '')
-                options = obj.get('options', [])
-
-                # 嚴格驗證：不降級
-                if raw_transcript is None or keyword_completion is None:
-                    return _pack_error("格式錯誤：缺少必要欄位")
-
-                if not isinstance(keyword_completion, list):
-                    return _pack_error("格式錯誤：keyword_completion 必須是列表")
-
-                if not isinstance(options, list):
-                    options = [original] if original else []
-
-                return _pack_full(raw_transcript, keyword_completion, original, options)
-        except Exception:
-            pass
+        # 只接受 JSON 物件：非 '{' 開頭的純文字直接視為解析失敗，不進解析器與例外路徑
+        if cleaned.startswith('{'):
+            try:
+                obj = json.loads(cleaned)
+                if isinstance(obj, dict):
+                    raw_transcript = obj.get('raw_transcript')
+                    keyword_completion = obj.get('keyword_completion')
+                    original = obj.get('original', '')
+                    options = obj.get('options', [])
+
+                    # 嚴格驗證：不降級
+                    if raw_transcript is None or keyword_completion is None:
+                        return _pack_error("格式錯誤：缺少必要欄位")
+
+                    if not isinstance(keyword_completion, list):
+                        return _pack_error("格式錯誤：keyword_completion 必須是列表")
+
+                    if not isinstance(options, list):
+                        options = [original] if original else []
+
+                    return _pack_full(raw_transcript, keyword_completion, original, options)
+            except Exception:
+                pass
 
         # 解析失敗：返回錯誤
         return _pack_error("JSON 解析錯誤")
@@ -4,7 +4,6 @@ DSPy 配置管理模組
 負責管理 DSPy 的初始化、配置載入和全局設置。
 """
 
-import yaml
 import logging
 import os
 from typing import Dict, Any, Optional
@@ -30,6 +29,8 @@ class DSPyConfig:
         self.config_path = config_path
         self._config: Optional[Dict[str, Any]] = None
         self._dspy_config: Optional[Dict[str, Any]] = None
+        self._enabled_cache: Optional[bool] = None
+        self._model_config_cache: Optional[Dict[str, Any]] = None
         
     def load_config(self) -> Dict[str, Any]:
         """載入配置文件
@@ -38,6 +39,8 @@ class DSPyConfig:
             完整的配置字典
         """
         if self._config is None:
+            import yaml  # 延遲載入：僅匯入本模組而未讀取設定檔時，不需付出 PyYAML 的匯入成本
+
             try:
                 with open(self.config_path, 'r', encoding='utf-8') as f:
                     self._config = yaml.safe_load(f)
@@ -117,7 +120,9 @@ class DSPyConfig:
         Returns:
             True 如果啟用 DSPy
         """
-        return self.get_dspy_config().get('enabled', False)
+        if self._enabled_cache is None:
+            self._enabled_cache = bool(self.get_dspy_config().get('enabled', False))
+        return self._enabled_cache
     
     def is_optimization_enabled(self) -> bool:
         """檢查是否啟用提示優化
@@ -139,8 +144,13 @@ class DSPyConfig:
         """獲取模型配置
         
         Returns:
-            模型配置字典
+            模型配置字典（呼叫端可能 pop 'provider'，故每次回傳淺拷貝）
         """
+        if self._model_config_cache is None:
+            self._model_config_cache = self._build_model_config()
+        return dict(self._model_config_cache)
+
+    def _build_model_config(self) -> Dict[str, Any]:
         dspy_config = self.get_dspy_config()
         provider = dspy_config.get('provider', 'gemini').lower()
 
@@ -200,6 +210,8 @@ class DSPyConfig:
         """重新載入配置（清除緩存）"""
         self._config = None
         self._dspy_config = None
+        self._enabled_cache = None
+        self._model_config_cache = None
         logger.info("配置緩存已清除，將在下次訪問時重新載入")
 
 # 全局配置實例
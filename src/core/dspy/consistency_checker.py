@@ -10,12 +10,25 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional
+from dataclasses import asdict, dataclass
+from typing import List, Dict, Optional, Pattern, Tuple
 import re
 
 
-@dataclass
+# 無可抽取文字時的事實樣板；結果會對外暴露，使用處一律複製
+_EMPTY_FACTS: Dict[str, Optional[bool]] = {"fever": None, "pain": None}
+_SPEAKER_PREFIX = "對話方:"
+
+
+def _compile_all(*patterns: str) -> Tuple[Pattern[str], ...]:
+    return tuple(re.compile(p) for p in patterns)
+
+
+def _fact_pattern(neg: Tuple[str, ...], pos: Tuple[str, ...]) -> Pattern[str]:
+    return re.compile(f"(?P<neg>{'|'.join(neg)})|(?P<pos>{'|'.join(pos)})")
+
+
+@dataclass(slots=True)
 class Contradiction:
     type: str
     severity: str
@@ -23,14 +36,14 @@ class Contradiction:
     evidence: Dict
 
 
-@dataclass
+@dataclass(slots=True)
 class TimelineEvent:
     type: str
     when: str
     norm_time: float  # 0.0 遠古 → 1.0 目前
 
 
-@dataclass
+@dataclass(slots=True)
 class ConsistencyResult:
     score: float
     has_contradictions: bool
@@ -44,21 +57,32 @@ class MedicalFactTracker:
     """簡易醫療事實抽取器（規則版）"""
 
     # 注意：避免可選否定導致匹配到肯定句（如 r"不?發燒" 會誤匹配 "發燒"）。
-    fever_neg_patterns = [r"沒有發燒", r"沒發燒", r"不發燒", r"沒發熱", r"沒有發熱", r"不發熱"]
-    fever_pos_patterns = [r"發燒", r"發熱", r"體溫(有)?升高", r"很熱"]
-
-    pain_neg_patterns = [r"不痛", r"沒有痛", r"沒痛", r"不疼", r"沒有疼", r"沒疼"]
-    pain_pos_patterns = [r"痛", r"疼", r"酸痛", r"不舒服"]
-
-    time_tokens = {
+    # 否定/肯定合併為單一交替樣式（否定在前），一次掃描即可判定。
+    fever_pattern = _fact_pattern(
+        neg=(r"沒有發燒", r"沒發燒", r"不發燒", r"沒發熱", r"沒有發熱", r"不發熱"),
+        pos=(r"發燒", r"發熱", r"體溫有?升高", r"很熱"),
+    )
+    pain_pattern = _fact_pattern(
+        neg=(r"不痛", r"沒有痛", r"沒痛", r"不疼", r"沒有疼", r"沒疼"),
+        pos=(r"痛", r"疼", r"酸痛", r"不舒服"),
+    )
+
+    time_tokens = (
         # 近 → 遠（值越大越近）
-        r"現在|目前|剛剛|剛才": 1.0,
-        r"(今天|今早|今天早上|今天晚上)": 0.9,
-        r"(幾|數)小時前": 0.8,
-        r"(昨天|昨晚)": 0.6,
-        r"前天": 0.5,
-        r"(上週|上周)": 0.2,
-    }
+        (r"現在|目前|剛剛|剛才", 1.0),
+        (r"(?:今天|今早|今天早上|今天晚上)", 0.9),
+        (r"(?:幾|數)小時前", 0.8),
+        (r"(?:昨天|昨晚)", 0.6),
+        (r"前天", 0.5),
+        (r"(?:上週|上周)", 0.2),
+    )
+    # 全部時間語彙合併為單一交替樣式，群組名 t0..t5 對應 time_tokens 的分數；
+    # 包在前瞻 (?=...) 內為零寬比對，逐位置掃描，重疊的語彙（如「目前天」中的 目前/前天）都會被找到。
+    # 各類語彙首字互不相同，同一位置至多一類成立，交替順序不會遮蔽其他類別。
+    time_pattern = re.compile(
+        "(?=" + "|".join(f"(?P<t{i}>{pattern})" for i, (pattern, _) in enumerate(time_tokens)) + ")"
+    )
+    time_scores = tuple((f"t{i}", score) for i, (_, score) in enumerate(time_tokens))
 
     def extract(self, text: str) -> Dict:
         text = text or ""
@@ -67,18 +91,8 @@ class MedicalFactTracker:
             "pain": None,
         }
 
-        # Fever
-        if self._match_any(text, self.fever_neg_patterns):
-            facts["fever"] = False
-        elif self._match_any(text, self.fever_pos_patterns):
-            facts["fever"] = True
-
-        # Pain
-        if self._match_any(text, self.pain_neg_patterns):
-            facts["pain"] = False
-        elif self._match_any(text, self.pain_pos_patterns):
-            facts["pain"] = True
-
+        facts["fever"] = self._scan_fact(text, self.fever_pattern)
+        facts["pain"] = self._scan_fact(text, self.pain_pattern)
         return facts
 
     def extract_timeline(self, text: str) -> List[TimelineEvent]:
@@ -86,20 +100,31 @@ class MedicalFactTracker:
         events: List[TimelineEvent] = []
 
         # 偵測「開始」相關的語句，綁定症狀（若能判斷）
-        has_start = bool(re.search(r"開始", text))
+        has_start = "開始" in text
         topic = "symptom_start" if has_start else "context_time"
 
-        # 依 time_tokens 建立事件
-        for pattern, score in self.time_tokens.items():
-            if re.search(pattern, text):
-                when = re.search(pattern, text).group(0)
+        # 單次掃描記下每類時間語彙第一次出現的字樣，再依 time_tokens 順序建立事件
+        first_seen: Dict[str, str] = {}
+        for match in self.time_pattern.finditer(text):
+            name = match.lastgroup
+            if name not in first_seen:
+                first_seen[name] = match.group(name)
+        for name, score in self.time_scores:
+            when = first_seen.get(name)
+            if when is not None:
                 events.append(TimelineEvent(type=topic, when=when, norm_time=score))
 
         return events
 
     @staticmethod
-    def _match_any(text: str, patterns: List[str]) -> bool:
-        return any(re.search(p, text) for p in patterns)
+    def _scan_fact(text: str, pattern: Pattern[str]) -> Optional[bool]:
+        """任一處出現否定即為 False；僅有肯定為 True；皆無為 None"""
+        found_pos = False
+        for match in pattern.finditer(text):
+            if match.lastgroup == "neg":
+                return False
+            found_pos = True
+        return True if found_pos else None
 
 
 class TimelineValidator:
@@ -118,7 +143,7 @@ class TimelineValidator:
                     type="timeline_inconsistency",
                     severity="medium",
                     description="症狀開始時間在 今天 與 昨天/昨晚 之間矛盾",
-                    evidence={"events": [e.__dict__ for e in starts]},
+                    evidence={"events": [asdict(e) for e in starts]},
                 ))
         return contradictions
 
@@ -154,8 +179,8 @@ class ContradictionDetector:
 class DialogueConsistencyChecker:
     """對話一致性檢查器（入口）"""
 
-    self_intro_patterns = [r"我是Patient", r"我是[\u4e00-\u9fa5A-Za-z0-9_]+", r"您好，我是", r"我叫"]
-    generic_patterns = [r"我可能沒有完全理解", r"能請您換個方式說明", r"您需要什麼幫助"]
+    self_intro_patterns = _compile_all(r"我是Patient", r"我是[\u4e00-\u9fa5A-Za-z0-9_]+", r"您好，我是", r"我叫")
+    generic_patterns = _compile_all(r"我可能沒有完全理解", r"能請您換個方式說明", r"您需要什麼幫助")
 
     def __init__(self):
         self.fact_tracker = MedicalFactTracker()
@@ -168,10 +193,17 @@ class DialogueConsistencyChecker:
         conversation_history: List[str],
         character_context: Optional[Dict] = None,
     ) -> ConsistencyResult:
+        # 0) 無任何回應與歷史文字（暖機/測試路徑）時直接回傳乾淨結果，不跑規則比對
+        if not any(new_responses or ()) and not any(conversation_history or ()):
+            return self._empty_result()
+
         # 1) 準備歷史中的上一則病患事實
         last_patient_utt = self._get_last_patient_utterance(conversation_history)
-        previous_facts = self.fact_tracker.extract(last_patient_utt)
-        previous_timeline = self.fact_tracker.extract_timeline(last_patient_utt)
+        if last_patient_utt:
+            previous_facts = self.fact_tracker.extract(last_patient_utt)
+            previous_timeline = self.fact_tracker.extract_timeline(last_patient_utt)
+        else:
+            previous_facts, previous_timeline = dict(_EMPTY_FACTS), []
 
         # 2) 以第一個新回應為代表抽取新事實（保守策略）
         candidate = (new_responses or [""])[0]
@@ -203,19 +235,23 @@ class DialogueConsistencyChecker:
             ))
 
         # 5) 評分與嚴重度
-        timeline_issues = [c for c in contradictions if c.type == "timeline_inconsistency"]
-        fever_issues = [c for c in contradictions if c.type == "fever_state_flip"]
-        pain_issues = [c for c in contradictions if c.type == "pain_state_flip"]
-        self_intro_issues = [c for c in contradictions if c.type == "self_introduction"]
-        generic_issues = [c for c in contradictions if c.type == "generic_response"]
+        # 單次掃描依類型計數
+        counts: Dict[str, int] = {}
+        for c in contradictions:
+            counts[c.type] = counts.get(c.type, 0) + 1
+        timeline_issues = counts.get("timeline_inconsistency", 0)
+        fever_issues = counts.get("fever_state_flip", 0)
+        pain_issues = counts.get("pain_state_flip", 0)
+        self_intro_issues = counts.get("self_introduction", 0)
+        generic_issues = counts.get("generic_response", 0)
 
         # 粗略分數（0~1）
         penalties = (
-            0.25 * len(timeline_issues)
-            + 0.25 * len(fever_issues)
-            + 0.15 * len(pain_issues)
-            + 0.25 * len(self_intro_issues)
-            + 0.10 * len(generic_issues)
+            0.25 * timeline_issues
+            + 0.25 * fever_issues
+            + 0.15 * pain_issues
+            + 0.25 * self_intro_issues
+            + 0.10 * generic_issues
         )
         score = max(0.0, 1.0 - min(1.0, penalties))
 
@@ -238,9 +274,20 @@ class DialogueConsistencyChecker:
         return result
 
     @staticmethod
-    def _match_any(text: str, patterns: List[str]) -> bool:
+    def _match_any(text: str, patterns: Tuple[Pattern[str], ...]) -> bool:
         text = text or ""
-        return any(re.search(p, text) for p in patterns)
+        return any(p.search(text) for p in patterns)
+
+    @staticmethod
+    def _empty_result() -> ConsistencyResult:
+        return ConsistencyResult(
+            score=1.0,
+            has_contradictions=False,
+            contradictions=[],
+            facts={"previous": dict(_EMPTY_FACTS), "new": dict(_EMPTY_FACTS)},
+            timeline=[],
+            severity="low",
+        )
 
     @staticmethod
     def _get_last_patient_utterance(history: List[str]) -> str:
@@ -248,6 +295,8 @@ class DialogueConsistencyChecker:
             return ""
         # 非「對話方: 」開頭的條目視為病患/系統；取最後一個非對話方條目
         for entry in reversed(history):
-            if not str(entry).startswith("對話方:"):
-                return str(entry)
+            if not isinstance(entry, str):
+                entry = str(entry)
+            if not entry.startswith(_SPEAKER_PREFIX):
+                return entry
         return ""
@@ -6,6 +6,7 @@
 解決 Gemini API 配額限制問題。
 """
 
+import asyncio
 import json
 import logging
 import re
@@ -14,12 +15,19 @@ from typing import Any, Dict, List, Optional, Union
 
 from ..dialogue import DialogueManager
 from ..character import Character
+from ..state import DialogueState
 from .unified_dialogue_module import UnifiedDSPyDialogueModule
 from .sensitive_question_module import SensitiveQuestionRewriteModule
 from .config import get_config
 
 logger = logging.getLogger(__name__)
 
+# 狀態字串 -> DialogueState，於匯入時建立一次；查表取代每輪的 Enum 建構與例外處理
+_STATE_LOOKUP: Dict[str, DialogueState] = {state.value: state for state in DialogueState}
+
+# 終端機模式可選擇的回應選項按鍵
+_CHOICE_KEYS = frozenset({'1', '2', '3', '4', '5'})
+
 
 class OptimizedDialogueManagerDSPy(DialogueManager):
     """優化版 DSPy 對話管理器
@@ -66,6 +74,10 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
         }
         self._character_profile_emitted = False
         self._last_turn_timings: Optional[Dict] = None
+        # (character, details, 結果)：同一角色與 details 物件不變時重用
+        self._character_details_cache: Optional[tuple] = None
+        # LM 呼叫移到 worker thread 後，同一會話的輪次仍需依序處理
+        self._turn_lock = asyncio.Lock()
 
     async def process_turn(self, user_input: str, gui_selected_response: Optional[str] = None) -> Union[str, dict]:
         """處理優化版對話輪次
@@ -77,6 +89,10 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
         Returns:
             Either a string response (terminal mode) or JSON response (GUI mode)
         """
+        async with self._turn_lock:
+            return await self._process_turn_locked(user_input, gui_selected_response)
+
+    async def _process_turn_locked(self, user_input: str, gui_selected_response: Optional[str]) -> Union[str, dict]:
         if not self.optimization_enabled:
             raise RuntimeError("OptimizedDialogueManagerDSPy is disabled (fail-fast; no fallback).")
         
@@ -130,7 +146,9 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
             self._last_turn_timings = None
 
             _t_dialogue_module_start = time.time()
-            prediction = self.dialogue_module(
+            # DSPy/Gemini 呼叫為同步阻塞 I/O，交由 worker thread 執行以免卡住事件迴圈
+            prediction = await asyncio.to_thread(
+                self.dialogue_module,
                 user_input=user_input,
                 character_name=self.character.name,
                 character_persona=self.character.persona,
@@ -158,7 +176,7 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
 
             # 讓 rewrite 模組決策是否需要改寫（若停用，直接使用基礎預測）
             _t_sensitive_rewrite_start = time.time()
-            rewrite_result = self._attempt_sensitive_rewrite(user_input, prediction)
+            rewrite_result = await asyncio.to_thread(self._attempt_sensitive_rewrite, user_input, prediction)
             _t_sensitive_rewrite_end = time.time()
             _sensitive_rewrite_triggered = rewrite_result is not None
 
@@ -174,7 +192,7 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
 
             # 處理終端機模式或 GUI 模式
             if self.use_terminal:
-                result = self._handle_terminal_mode(user_input, response_data)
+                result = await asyncio.to_thread(self._handle_terminal_mode, user_input, response_data)
             else:
                 result = self._handle_gui_mode(user_input, response_data, gui_selected_response)
             _t_post_processing_end = time.time()
@@ -218,7 +236,18 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
                 return self._generate_emergency_response(user_input)
     
     def _get_character_details(self) -> Any:
-        """回傳完整的角色詳細設定（盡可能保留 characters.yaml 的全部資訊）。
+        """回傳角色詳細設定；角色與 details 未變動時直接重用上次結果。"""
+        character = self.character
+        details = getattr(character, 'details', None)
+        cached = self._character_details_cache
+        if cached is not None and cached[0] is character and cached[1] is details:
+            return cached[2]
+        result = self._build_character_details()
+        self._character_details_cache = (character, details, result)
+        return result
+
+    def _build_character_details(self) -> Any:
+        """建立完整的角色詳細設定（盡可能保留 characters.yaml 的全部資訊）。
 
         - 若有 details 字典：返回 { fixed_settings, floating_settings, summary }
         - 若 details 為可解析的 JSON 字串：解析後返回同上結構
@@ -400,19 +429,16 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
     
     def _update_dialogue_state(self, response_data: dict):
         """更新對話狀態"""
-        try:
-            from ..state import DialogueState
-            new_state = response_data.get("state", "NORMAL")
-            self.current_state = DialogueState(new_state)
-            
-            dialogue_context = response_data.get("dialogue_context", "")
-            if dialogue_context:
-                print(f"優化 DSPy 判斷的對話情境: {dialogue_context}")
-                
-        except ValueError as e:
-            self.logger.warning(f"無效狀態，設置為 CONFUSED: {e}")
-            from ..state import DialogueState
-            self.current_state = DialogueState.CONFUSED
+        new_state = response_data.get("state", "NORMAL")
+        state = _STATE_LOOKUP.get(new_state) if isinstance(new_state, str) else None
+        if state is None:
+            self.logger.warning("無效狀態，設置為 CONFUSED: %r", new_state)
+            state = DialogueState.CONFUSED
+        self.current_state = state
+
+        dialogue_context = response_data.get("dialogue_context", "")
+        if dialogue_context:
+            self.logger.debug("優化 DSPy 判斷的對話情境: %s", dialogue_context)
     
     def _handle_terminal_mode(self, user_input: str, response_data: dict) -> str:
         """處理終端機模式的互動"""
@@ -431,22 +457,23 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
         while True:
             event = keyboard.read_event(suppress=True)
             if event.event_type == 'down':
-                if event.name == '0':
+                name = event.name
+                if name == '0':
                     print("\n跳過此輪回應，請繼續對話")
                     self.conversation_history.append("(跳過此輪回應)")
                     self.log_interaction(user_input, responses, selected_response="(跳過此輪回應)")
                     self.save_interaction_log()
                     return ""
-                elif event.name == 'q':
+                elif name == 'q':
                     print("\n結束對話")
                     print(self._get_optimization_summary())
-                    self.save_interaction_log()
+                    self.save_interaction_log(force=True)
                     return "quit"
-                elif event.name == 's':
+                elif name == 's':
                     print("\n" + self._get_optimization_summary())
                     continue
-                elif event.name in ['1', '2', '3', '4', '5']:
-                    choice = int(event.name)
+                elif name in _CHOICE_KEYS:
+                    choice = int(name)
                     if choice <= len(responses):
                         selected_response = responses[choice - 1]
                         print(f"\n已選擇選項 {choice}: {selected_response}")
@@ -533,8 +560,6 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
         return [str(responses).strip()]
 
     def _normalize_state_value(self, raw_state: Any) -> str:
-        allowed = {'NORMAL', 'CONFUSED', 'TRANSITIONING', 'TERMINATED'}
-
         if isinstance(raw_state, dict):
             return self._normalize_state_value(raw_state.get('state') or raw_state.get('name'))
         if isinstance(raw_state, (list, tuple)):
@@ -547,7 +572,7 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
             return 'NORMAL'
 
         candidate = str(raw_state).strip().upper()
-        if candidate in allowed:
+        if candidate in _STATE_LOOKUP:
             return candidate
         return 'NORMAL'
 
@@ -828,6 +853,7 @@ class OptimizedDialogueManagerDSPy(DialogueManager):
         # 顯示最終統計
         final_stats = self.get_optimization_statistics()
         self.logger.info(f"最終優化統計: {final_stats}")
+        self.save_interaction_log(force=True)
         
         if hasattr(self, 'dialogue_module') and hasattr(self.dialogue_module, 'cleanup'):
             self.dialogue_module.cleanup()
@@ -9,8 +9,9 @@
 import dspy
 import json
 import logging
-import os
+import re
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
 
 from dspy.adapters import JSONAdapter
@@ -44,6 +45,19 @@ PERSONA_REMINDER_TEMPLATE = (
     "不得自我介紹或自稱 AI，所有回應需使用繁體中文。"
 )
 
+
+# 數值問句觸發詞：「幾」已涵蓋幾次、幾罐、幾顆、幾點、幾天…等所有「幾○」組合
+_NUMERIC_QUERY_KEYWORDS = ("幾", "多少")
+# 量詞/數字圖樣：阿拉伯數字 + 量詞（罐/瓶/袋/次）也可視作數值意圖
+_NUMERIC_QUANTITY_RE = re.compile(r"\d+\s*(罐|瓶|袋|次|顆|片|毫升|公克)")
+
+
+@lru_cache(maxsize=256)
+def _persona_reminder(name: str, persona: str) -> str:
+    """角色姓名與個性在會話中固定，提醒字串只需套版一次。"""
+    return PERSONA_REMINDER_TEMPLATE.format(name=name, persona=persona)
+
+
 DEFAULT_CONTEXT_PRIORITY = [
     "daily_routine_examples",
     "treatment_examples",
@@ -54,22 +68,27 @@ DEFAULT_CONTEXT_PRIORITY = [
 class UnifiedPatientResponseSignature(dspy.Signature):
     """統一的病患回應生成簽名（精簡提示 + 可優化規則欄位）。"""
 
-    # 輸入欄位（核心語境）
-    user_input = dspy.InputField(desc="對話方的問題")
+    # 欄位順序即 user message 的輸出順序：同一會話中不變的角色設定與規則在前，
+    # 每輪變動的情境、歷史與提問在後，讓提示前綴在各輪之間保持一致以利 prefix cache。
+
+    # 輸入欄位（角色設定，會話期間固定）
     character_name = dspy.InputField(desc="病患姓名")
     character_persona = dspy.InputField(desc="病患性格")
     character_backstory = dspy.InputField(desc="病患背景")
     character_goal = dspy.InputField(desc="病患目標")
     character_details = dspy.InputField(desc="關鍵病情資訊")
-    conversation_history = dspy.InputField(desc="近期對話與提醒")
-    fewshot_examples = dspy.InputField(desc="回應格式示範範例")
-    available_contexts = dspy.InputField(desc="候選情境")
 
     # 輸入欄位（可優化規則區塊：提供給 DSPy Optimizer 作為 prompt 片段）
     term_usage_rules = dspy.InputField(desc="用語規範（稱謂/職稱/敏感詞替換）")
     response_style_rules = dspy.InputField(desc="回應風格/多樣性/格式化規範")
     persona_voice_rules = dspy.InputField(desc="病患語氣與知識邊界規則")
 
+    # 輸入欄位（每輪變動）
+    fewshot_examples = dspy.InputField(desc="回應格式示範範例")
+    available_contexts = dspy.InputField(desc="候選情境")
+    conversation_history = dspy.InputField(desc="近期對話與提醒")
+    user_input = dspy.InputField(desc="對話方的問題")
+
     # 輸出欄位
     context_classification = dspy.OutputField(desc="情境分類 ID")
     responses = dspy.OutputField(desc="四個病患回應，嚴禁包含任何括號、動作描述、肢體語言或省略號（...），只輸出流暢完整的純口語句子")
@@ -342,7 +361,7 @@ class UnifiedDSPyDialogueModule(DSPyDialogueModule):
                     if self._last_context_label is None:
                         if self._fewshot_bootstrap_enabled:
                             examples = self.scenario_manager.get_bootstrap_examples()[:self._fewshot_max_examples]
-                            logger.debug(f"📚 第一輪：載入 {len(examples)} 個 bootstrap 範例（多角色覆蓋）")
+                            logger.debug("📚 第一輪：載入 %d 個 bootstrap 範例（多角色覆蓋）", len(examples))
                         else:
                             examples = []
                             logger.debug("📚 第一輪：bootstrap few-shot 已停用")
@@ -353,13 +372,13 @@ class UnifiedDSPyDialogueModule(DSPyDialogueModule):
                             previous_context=self._last_context_label,
                             max_examples=self._fewshot_max_examples,
                         )
-                        logger.debug(f"📚 後續輪：載入 {len(examples)} 個情境範例 (context={self._last_context_label})")
+                        logger.debug("📚 後續輪：載入 %d 個情境範例 (context=%s)", len(examples), self._last_context_label)
 
                     if examples:
                         self._fewshot_used = True
                         fewshot_section = self.scenario_manager.format_examples_for_prompt(examples)
                 except Exception as e:
-                    logger.debug(f"Few-shot 載入失敗: {e}")
+                    logger.debug("Few-shot 載入失敗: %s", e)
             elif not self._fewshot_enabled:
                 logger.debug("📚 few-shot 已由設定停用")
 
@@ -374,7 +393,7 @@ class UnifiedDSPyDialogueModule(DSPyDialogueModule):
             # few-shot 範例獨立傳遞，不混入 conversation_history（語意分離）
             fewshot_for_input = fewshot_section if fewshot_section else ""
             if fewshot_for_input:
-                logger.debug(f"📚 Few-shot 範例獨立傳遞（長度: {len(fewshot_for_input)} 字元）")
+                logger.debug("📚 Few-shot 範例獨立傳遞（長度: %d 字元）", len(fewshot_for_input))
 
             current_call = self.unified_stats['total_unified_calls'] + 1
             logger.info(f"🚀 Unified DSPy call #{current_call} - {character_name} processing {len(conversation_history)} history entries")
@@ -483,14 +502,11 @@ class UnifiedDSPyDialogueModule(DSPyDialogueModule):
             logger.error(f"Input: {user_input[:100]}... (character: {character_name})")
             # 嘗試從例外訊息中救回 LM 的 JSON 片段
             try:
-                import re
-                msg = str(e)
-                start = msg.find('{')
-                end = msg.rfind('}')
+                _, sep, rest = str(e).partition('{')
+                core, sep_end, _ = rest.rpartition('}')
                 salvaged = None
-                if start != -1 and end != -1 and end > start:
-                    snippet = msg[start:end+1]
-                    salvaged = json.loads(snippet)
+                if sep and sep_end:
+                    salvaged = json.loads('{' + core + '}')
                 if isinstance(salvaged, dict):
                     salv_responses = salvaged.get('responses') or []
                     if isinstance(salv_responses, str):
@@ -788,7 +804,7 @@ class UnifiedDSPyDialogueModule(DSPyDialogueModule):
         Returns:
             str: 格式化後的對話歷史
         """
-        reminder = PERSONA_REMINDER_TEMPLATE.format(name=character_name, persona=character_persona)
+        reminder = _persona_reminder(character_name, character_persona)
 
         if not conversation_history:
             return reminder
@@ -905,18 +921,9 @@ class UnifiedDSPyDialogueModule(DSPyDialogueModule):
         s = text.strip()
         if not s:
             return False
-        # 觸發詞：幾、多少、幾次、幾罐、幾盒、幾顆、幾片、幾毫升、幾公克、幾點、幾天...
-        keywords = [
-            "幾", "多少", "幾次", "幾罐", "幾瓶", "幾袋", "幾顆", "幾片", "幾毫升", "幾公克",
-            "幾點", "幾天", "幾週", "幾個", "幾項", "幾人", "幾號",
-        ]
-        # 量詞/數字圖樣：阿拉伯數字 + 量詞（罐/瓶/袋/次）也可視作數值意圖
-        import re
-        if any(k in s for k in keywords):
+        if any(k in s for k in _NUMERIC_QUERY_KEYWORDS):
             return True
-        if re.search(r"\d+\s*(罐|瓶|袋|次|顆|片|毫升|公克)", s):
-            return True
-        return False
+        return _NUMERIC_QUANTITY_RE.search(s) is not None
     
     def reset_unified_statistics(self):
         """重置統一模組統計"""
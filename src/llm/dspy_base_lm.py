@@ -2,18 +2,28 @@
 
 from __future__ import annotations
 
-import json
 import logging
+import re
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
 import dspy
+import orjson
 
 logger = logging.getLogger(__name__)
 logger.propagate = True
 
+# 開頭 ```json 與結尾 ``` 圍欄合併為單一預編譯樣式，一次掃描移除
+_MARKDOWN_FENCE_RE = re.compile(r'^```(?:json)?\s*\n|\n```\s*$', re.MULTILINE)
+
+# JSONAdapter 必要欄位與缺值時的預設；responses 的 [] 之後會被重建為新 list，不會被共用修改
+_RESPONSE_FIELD_DEFAULTS = {
+    "context_classification": "unspecified",
+    "responses": [],
+}
+
 
 class DSPyResponse:
     """Simple response wrapper used by legacy code paths."""
@@ -225,16 +235,12 @@ class BaseDSPyLM(dspy.LM):
         return str(messages)
 
     def _clean_markdown_json(self, response: str) -> str:
-        import re
-
-        cleaned = re.sub(r'^```(?:json)?\s*\n', '', response.strip(), flags=re.MULTILINE)
-        cleaned = re.sub(r'\n```\s*$', '', cleaned.strip(), flags=re.MULTILINE)
-        cleaned = cleaned.strip()
+        cleaned = _MARKDOWN_FENCE_RE.sub('', response.strip()).strip()
 
         try:
-            json.loads(cleaned)
+            orjson.loads(cleaned)
             return cleaned
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logger.warning("清理後的回應不是有效 JSON，返回原始回應")
             return response
 
@@ -244,28 +250,17 @@ class BaseDSPyLM(dspy.LM):
             if not (s.startswith('{') and s.endswith('}')):
                 return text
 
-            obj = json.loads(s)
-            if not isinstance(obj, dict):
-                return text
+            # 以 { 開頭、} 結尾且可解析者必為 dict，不需再檢查型別
+            obj = orjson.loads(s)
 
             # Fill missing fields with defaults to prevent JSONAdapter failures.
-            required = [
-                "context_classification",
-                "responses",
-            ]
-
-            defaults = {
-                "context_classification": "unspecified",
-                "responses": [],
-            }
-
-            for key in required:
-                if key not in obj or obj[key] in (None, ""):
-                    obj[key] = defaults[key]
+            for key, default in _RESPONSE_FIELD_DEFAULTS.items():
+                if obj.get(key) in (None, ""):
+                    obj[key] = default
 
             if isinstance(obj.get("responses"), str):
                 try:
-                    maybe_list = json.loads(obj["responses"])
+                    maybe_list = orjson.loads(obj["responses"])
                     if isinstance(maybe_list, list):
                         obj["responses"] = [str(x) for x in maybe_list[:5]]
                     else:
@@ -277,7 +272,7 @@ class BaseDSPyLM(dspy.LM):
             else:
                 obj["responses"] = [str(obj["responses"])]
 
-            normalized = json.dumps(obj, ensure_ascii=False)
+            normalized = orjson.dumps(obj).decode()
             return normalized
 
         except Exception:  # pragma: no cover - return original on failure
@@ -1,13 +1,13 @@
-from google import genai
-from google.genai import types
 from ..utils.config import load_config
 import logging
 import os
 import json
 import hashlib
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from ..core.audio.context_utils import (
     format_history_for_audio,
@@ -18,6 +18,19 @@ from ..core.audio.context_utils import (
 from ..core.dspy.audio_modules import get_audio_prompt_composer
 from ..utils.settings import DEFAULT_GEMINI_MODEL, get_gemini_model
 
+# 單次音頻轉錄的中繼資料欄位，與實例上的 _last_audio_* 診斷屬性一一對應（trace_id 對應 _last_trace_id）
+_AUDIO_META_KEYS = (
+    "prompt", "system_prompt", "user_prompt", "template_rules", "raw", "clean", "trace_id",
+    "used_dspy", "signature", "raw_transcript", "keyword_completion",
+    "timings", "finish_reason", "retry_finish_reason", "parse_mode",
+)
+
+
+def _new_audio_meta() -> Dict[str, Any]:
+    meta: Dict[str, Any] = dict.fromkeys(_AUDIO_META_KEYS)
+    meta["used_dspy"] = False
+    return meta
+
 class GeminiClient:
     def __init__(
         self,
@@ -29,6 +42,12 @@ class GeminiClient:
         config = load_config()
         self.logger = logging.getLogger(__name__)
 
+        # google-genai 匯入成本高，延後到實際建立 client 時才載入
+        from google import genai
+        from google.genai import types
+
+        self._types = types
+
         # API key
         effective_api_key = api_key or config.get("google_api_key")
         self._client = genai.Client(api_key=effective_api_key)
@@ -81,7 +100,43 @@ class GeminiClient:
         self._last_audio_finish_reason: Optional[str] = None
         self._last_audio_retry_finish_reason: Optional[str] = None
         self._last_audio_parse_mode: Optional[str] = None
-        
+
+        # 回應快取：相同提示詞（已含完整歷史）直接重用上次結果；需以頂層 response_cache.enabled 明確開啟
+        # （刻意不放在 llm: 之下，避免只為開快取就觸發新版 llm 設定結構而改變模型與生成參數）
+        cache_cfg = config.get("response_cache") or {}
+        self._response_cache_enabled = bool(cache_cfg.get("enabled", False))
+        self._response_cache_ttl = float(cache_cfg.get("ttl", 3600) or 0)
+        self._response_cache_max_entries = int(cache_cfg.get("max_entries", 1024) or 0)
+        self._response_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._response_cache_lock = threading.Lock()
+
+    def _response_cache_key(self, prompt: Any) -> Optional[bytes]:
+        if not (self._response_cache_enabled and self._response_cache_max_entries > 0):
+            return None
+        if not isinstance(prompt, str):
+            return None
+        return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+
+    def _get_cached_response(self, key: bytes) -> Optional[str]:
+        with self._response_cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is None:
+                return None
+            expires_at, text = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._response_cache[key]
+                return None
+            self._response_cache.move_to_end(key)
+            return text
+
+    def _store_cached_response(self, key: bytes, text: str) -> None:
+        expires_at = time.monotonic() + self._response_cache_ttl if self._response_cache_ttl > 0 else None
+        with self._response_cache_lock:
+            self._response_cache[key] = (expires_at, text)
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self._response_cache_max_entries:
+                self._response_cache.popitem(last=False)
+
     def _infer_mime_type(self, path: str) -> str:
         try:
             ext = os.path.splitext(path)[1].lower()
@@ -97,15 +152,22 @@ class GeminiClient:
 
     def generate_response(self, prompt: str) -> str:
         """生成回應並確保格式正確"""
+        cache_key = self._response_cache_key(prompt)
+        if cache_key is not None:
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                self.logger.info("Gemini 回應快取命中 (prompt=%s chars)", len(prompt))
+                return cached
+
         try:
             # 詳細記錄發送給 API 的請求
             self.logger.info(f"===== 發送請求到 Gemini API =====")
             self.logger.info("模型: %s", self.model_name)
             # 安全地處理 prompt 日誌
             if isinstance(prompt, str):
-                self.logger.debug(f"提示詞: {prompt[:100]}... (截斷顯示)")
+                self.logger.debug("提示詞: %s... (截斷顯示)", prompt[:100])
             else:
-                self.logger.debug(f"提示詞類型: {type(prompt)}, 內容: {str(prompt)[:100]}... (截斷顯示)")
+                self.logger.debug("提示詞類型: %s, 內容: %.100s... (截斷顯示)", type(prompt), prompt)
             
             # 設定生成參數以確保更好的格式控制
             generation_config = dict(self.generation_config)
@@ -118,6 +180,7 @@ class GeminiClient:
             thinking_budget = int(dspy_cfg.get('thinking_budget', 0))
 
             # 呼叫 API
+            types = self._types
             response = self._client.models.generate_content(
                 model=self.model_name,
                 contents=prompt,
@@ -139,7 +202,7 @@ class GeminiClient:
             
             # 記錄 API 回傳的結果
             self.logger.info(f"===== 接收到 Gemini API 回應 =====")
-            self.logger.debug(f"回應長度: {len(response.text)}")
+            self.logger.debug("回應長度: %s", len(response.text))
             try:
                 candidates = getattr(response, "candidates", None) or []
                 finish_reason = None
@@ -164,11 +227,13 @@ class GeminiClient:
 
             # 紀錄最初和最後的一部分回應
             response_text = response.text.strip()
-            self.logger.debug(f"回應前100字符: {response_text[:100]}...")
+            self.logger.debug("回應前100字符: %s...", response_text[:100])
             if len(response_text) > 200:
-                self.logger.debug(f"回應最後100字符: ...{response_text[-100:]}")
+                self.logger.debug("回應最後100字符: ...%s", response_text[-100:])
             
-            # 直接返回模型的回應，不做額外處理
+            # 直接返回模型的回應，不做額外處理；僅快取成功的回應
+            if cache_key is not None:
+                self._store_cached_response(cache_key, response_text)
             return response_text
             
         except Exception as e:
@@ -187,51 +252,113 @@ class GeminiClient:
                          session_id: str = None,
                          trace_id: str = None,
                          option_count: int = None,
-                         transcription_only: bool = False) -> str:
-        """將音頻文件轉換為文本，回傳標準 JSON 字串。"""
+                         transcription_only: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """將音頻文件轉換為文本，回傳 (標準 JSON 字串, 本次呼叫的中繼資料)。"""
+        self.logger.info(f"音頻文件: {audio_file_path}")
+        _t_start = time.time()
+        self._last_audio_timings = None
+        if not os.path.exists(audio_file_path):
+            self.logger.error(f"音頻文件不存在: {audio_file_path}")
+            return json.dumps({
+                "original": "無法處理音頻文件：文件不存在",
+                "options": ["無法處理音頻文件：文件不存在"]
+            }), _new_audio_meta()
+
+        _t_audio_read_start = time.time()
+        try:
+            with open(audio_file_path, "rb") as f:
+                audio_data = f.read()
+        except Exception as e:
+            self.logger.error(f"讀取音頻文件失敗: {e}", exc_info=True)
+            return json.dumps({
+                "original": "無法讀取音頻文件",
+                "options": ["無法讀取音頻文件"]
+            }), _new_audio_meta()
+        _t_audio_read_end = time.time()
+
+        result, meta = self.transcribe_audio_bytes(
+            audio_data,
+            self._infer_mime_type(audio_file_path),
+            character=character,
+            conversation_history=conversation_history,
+            session_id=session_id,
+            trace_id=trace_id,
+            option_count=option_count,
+            transcription_only=transcription_only,
+        )
+        # 補上讀檔耗時（transcribe_audio_bytes 本身不含檔案 I/O）
+        timings = meta["timings"]
+        if timings is not None:
+            timings["audio_read_s"] = round(_t_audio_read_end - _t_audio_read_start, 4)
+            timings["total_s"] = round(time.time() - _t_start, 4)
+        return result, meta
+
+    def transcribe_audio_bytes(self, audio_data: bytes,
+                               mime_type: str = "audio/wav",
+                               character: object = None,
+                               conversation_history: object = None,
+                               session_id: str = None,
+                               trace_id: str = None,
+                               option_count: int = None,
+                               transcription_only: bool = False) -> Tuple[str, Dict[str, Any]]:
+        """將記憶體中的音頻內容轉換為文本（不經過暫存檔）。
+
+        回傳 (標準 JSON 字串, 本次呼叫的中繼資料)。提示詞、計時與解析模式隨結果一併回傳，
+        共用同一個 client 的並行請求不必再從實例屬性讀回，因此不需要互相等待。
+        """
+        meta = _new_audio_meta()
+        result = self._transcribe_audio_bytes(
+            audio_data,
+            mime_type,
+            meta,
+            character=character,
+            conversation_history=conversation_history,
+            session_id=session_id,
+            trace_id=trace_id,
+            option_count=option_count,
+            transcription_only=transcription_only,
+        )
+        self._publish_audio_meta(meta)
+        return result, meta
+
+    def _publish_audio_meta(self, meta: Dict[str, Any]) -> None:
+        """同步到 last_audio_* 診斷屬性（僅供除錯檢視；並行時為最後完成的呼叫）"""
+        self._last_trace_id = meta["trace_id"]
+        for key in _AUDIO_META_KEYS:
+            if key != "trace_id":
+                setattr(self, f"_last_audio_{key}", meta[key])
+
+    def _transcribe_audio_bytes(self, audio_data: bytes,
+                                mime_type: str,
+                                meta: Dict[str, Any],
+                                character: object = None,
+                                conversation_history: object = None,
+                                session_id: str = None,
+                                trace_id: str = None,
+                                option_count: int = None,
+                                transcription_only: bool = False) -> str:
         try:
             self.logger.info("===== 開始音頻轉文本 =====")
-            self.logger.info(f"音頻文件: {audio_file_path}")
             _t_start = time.time()
             _t_retry_start = _t_retry_end = None
-            self._last_audio_timings = None
-            self._last_audio_finish_reason = None
-            self._last_audio_retry_finish_reason = None
-            self._last_audio_parse_mode = None
             _primary_finish_reason: Optional[str] = None
             _retry_finish_reason: Optional[str] = None
             _parse_mode = "primary_unparsed"
 
-            if not os.path.exists(audio_file_path):
-                self.logger.error(f"音頻文件不存在: {audio_file_path}")
-                return json.dumps({
-                    "original": "無法處理音頻文件：文件不存在",
-                    "options": ["無法處理音頻文件：文件不存在"]
-                })
-
-            _t_audio_read_start = time.time()
+            # 音頻已在記憶體中，不計讀檔時間
+            _t_audio_read_start = _t_audio_read_end = time.time()
+            file_size = len(audio_data) / 1024
+            self.logger.debug("音頻文件大小: %.2f KB", file_size)
             try:
-                with open(audio_file_path, "rb") as f:
-                    audio_data = f.read()
-                file_size = len(audio_data) / 1024
-                self.logger.debug(f"音頻文件大小: {file_size:.2f} KB")
-                try:
-                    sha = hashlib.sha256(audio_data).hexdigest()[:8]
-                    self.logger.info(
-                        f"Audio meta: size_kb={file_size:.2f}, sha256_8={sha}, session_id={session_id or ''}, trace_id={trace_id or ''}"
-                    )
-                except Exception:
-                    pass
-                if file_size > 10 * 1024:
-                    self.logger.warning(f"音頻文件過大 ({file_size:.2f} KB)，可能超過 API 限制")
-            except Exception as e:
-                self.logger.error(f"讀取音頻文件失敗: {e}", exc_info=True)
-                return json.dumps({
-                    "original": "無法讀取音頻文件",
-                    "options": ["無法讀取音頻文件"]
-                })
-
-            _t_audio_read_end = time.time()
+                sha = hashlib.sha256(audio_data).hexdigest()[:8]
+                self.logger.info(
+                    f"Audio meta: size_kb={file_size:.2f}, sha256_8={sha}, session_id={session_id or ''}, trace_id={trace_id or ''}"
+                )
+            except Exception:
+                pass
+            if file_size > 10 * 1024:
+                self.logger.warning(f"音頻文件過大 ({file_size:.2f} KB)，可能超過 API 限制")
+
             _t_prompt_compose_start = time.time()
             if option_count is not None:
                 option_count = max(0, int(option_count))
@@ -278,8 +405,8 @@ class GeminiClient:
                     if template_variant in {"compact", "short", "lite"}:
                         template_path = Path("prompts/templates/audio_disfluency_template_compact.yaml")
 
-            self._last_trace_id = trace_id
-            self._last_audio_template_rules = template_rules
+            meta["trace_id"] = trace_id
+            meta["template_rules"] = template_rules
             composer = get_audio_prompt_composer(template_path=template_path)
             # Diagnostics: record and log signature/inputs presence
             sig_name = None
@@ -287,8 +414,8 @@ class GeminiClient:
                 sig_name = getattr(composer, 'signature').__name__  # type: ignore[attr-defined]
             except Exception:
                 sig_name = str(getattr(composer, 'signature', 'unknown'))
-            self._last_audio_used_dspy = True
-            self._last_audio_signature = sig_name
+            meta["used_dspy"] = True
+            meta["signature"] = sig_name
             self.logger.info(
                 "[DSPy] Using AudioPromptComposerModule (Signature=%s, template=%s) | profile_len=%s, history_len=%s, contexts_len=%s, rules_len=%s",
                 sig_name,
@@ -313,9 +440,9 @@ class GeminiClient:
                 len(system_prompt or ""), len(user_prompt or "")
             )
             combined_prompt = "\n\n".join([p for p in [system_prompt, user_prompt] if p]).strip()
-            self._last_audio_system_prompt = system_prompt
-            self._last_audio_user_prompt = user_prompt
-            self._last_audio_prompt = combined_prompt
+            meta["system_prompt"] = system_prompt
+            meta["user_prompt"] = user_prompt
+            meta["prompt"] = combined_prompt
             if self.logging_cfg.get('llm_raw', False):
                 max_len = int(self.logging_cfg.get('max_chars', 8000))
                 prefix = ''
@@ -323,8 +450,6 @@ class GeminiClient:
                     prefix = f"[session={session_id or ''} trace={trace_id or ''}] "
                 self.logger.info(f"{prefix}LM IN (audio/system): {system_prompt[:max_len]}")
                 self.logger.info(f"{prefix}LM IN (audio/user): {user_prompt[:max_len]}")
-            mime_type = self._infer_mime_type(audio_file_path)
-
             audio_max_tokens = int(self.audio_cfg.get("max_output_tokens", 1024) or 1024)
             if transcription_only:
                 audio_max_tokens = min(audio_max_tokens, 256)
@@ -334,6 +459,7 @@ class GeminiClient:
             _t_gemini_api_start = time.time()
             self.logger.info("調用 Gemini 多模態 API 進行音頻識別")
             self.logger.info("音頻識別參數: max_output_tokens=%s, thinking_budget=%s", audio_max_tokens, audio_thinking_budget)
+            types = self._types
             response = self._client.models.generate_content(
                 model=self.model_name,
                 contents=[
@@ -354,7 +480,7 @@ class GeminiClient:
             _t_gemini_api_end = time.time()
             _t_json_parse_start = time.time()
             result_text = response.text.strip()
-            self._last_audio_raw = result_text
+            meta["raw"] = result_text
             self.logger.info("===== 音頻識別完成 =====")
             try:
                 candidates = getattr(response, "candidates", None) or []
@@ -362,7 +488,7 @@ class GeminiClient:
                 if candidates:
                     finish_reason = getattr(candidates[0], "finish_reason", None)
                 _primary_finish_reason = str(finish_reason) if finish_reason is not None else None
-                self._last_audio_finish_reason = _primary_finish_reason
+                meta["finish_reason"] = _primary_finish_reason
                 prompt_feedback = getattr(response, "prompt_feedback", None)
                 self.logger.info("Gemini (audio) finish_reason: %s", finish_reason)
                 if prompt_feedback is not None:
@@ -387,7 +513,7 @@ class GeminiClient:
                         prefix = f"[session={session_id or ''} trace={trace_id or ''}] "
                     self.logger.info(f"{prefix}LM OUT (audio/raw): {result_text[:max_len]}")
                 else:
-                    self.logger.debug(f"識別結果: '{result_text[:100]}...'")
+                    self.logger.debug("識別結果: '%s...'", result_text[:100])
             except Exception:
                 pass
 
@@ -470,7 +596,7 @@ class GeminiClient:
                     if candidates:
                         finish_reason = getattr(candidates[0], "finish_reason", None)
                     _retry_finish_reason = str(finish_reason) if finish_reason is not None else None
-                    self._last_audio_retry_finish_reason = _retry_finish_reason
+                    meta["retry_finish_reason"] = _retry_finish_reason
                     self.logger.info("Gemini (audio retry) finish_reason: %s", finish_reason)
                 except Exception:
                     self.logger.debug("Failed to read Gemini audio retry finish_reason", exc_info=True)
@@ -531,7 +657,7 @@ class GeminiClient:
                     _parse_mode = "field_validation_failed"
                     _t_end = time.time()
                     _retry_triggered = _t_retry_start is not None and _t_retry_end is not None
-                    self._last_audio_timings = {
+                    meta["timings"] = {
                         "audio_read_s": round(_t_audio_read_end - _t_audio_read_start, 4),
                         "prompt_compose_s": round(_t_prompt_compose_end - _t_prompt_compose_start, 4),
                         "gemini_api_call_s": round(_t_gemini_api_end - _t_gemini_api_start, 4),
@@ -545,9 +671,9 @@ class GeminiClient:
                         "error": "field_validation_failed",
                     }
                     if _retry_triggered:
-                        self._last_audio_timings["gemini_retry_s"] = round(_t_retry_end - _t_retry_start, 4)
-                    self._last_audio_parse_mode = _parse_mode
-                    self.logger.info("[Timing] transcribe_audio (error): %s", self._last_audio_timings)
+                        meta["timings"]["gemini_retry_s"] = round(_t_retry_end - _t_retry_start, 4)
+                    meta["parse_mode"] = _parse_mode
+                    self.logger.info("[Timing] transcribe_audio (error): %s", meta["timings"])
                     error_result = json.dumps({
                         "error": "格式錯誤：缺少必要欄位",
                         "raw_transcript": raw_transcript or "",
@@ -555,12 +681,12 @@ class GeminiClient:
                         "original": "語音識別格式錯誤，請重試",
                         "options": [] if option_count == 0 else ["語音識別格式錯誤，請重試"]
                     }, ensure_ascii=False)
-                    self._last_audio_clean = error_result
+                    meta["clean"] = error_result
                     return error_result
 
-                # 保存到診斷屬性
-                self._last_audio_raw_transcript = raw_transcript
-                self._last_audio_keyword_completion = keyword_completion
+                # 保存到本次呼叫的中繼資料
+                meta["raw_transcript"] = raw_transcript
+                meta["keyword_completion"] = keyword_completion
 
                 # 返回完整結構
                 result = {
@@ -569,18 +695,18 @@ class GeminiClient:
                     "original": original or "",
                     "options": options or []
                 }
-                self._last_audio_clean = json.dumps(result, ensure_ascii=False)
+                meta["clean"] = json.dumps(result, ensure_ascii=False)
 
                 if self.logging_cfg.get('llm_raw', False):
                     max_len = int(self.logging_cfg.get('max_chars', 8000))
                     prefix = ''
                     if session_id or trace_id:
                         prefix = f"[session={session_id or ''} trace={trace_id or ''}] "
-                    self.logger.info(f"{prefix}LM OUT (audio/clean): {self._last_audio_clean[:max_len]}")
+                    self.logger.info(f"{prefix}LM OUT (audio/clean): {meta['clean'][:max_len]}")
 
                 _t_end = time.time()
                 _retry_triggered = _t_retry_start is not None and _t_retry_end is not None
-                self._last_audio_timings = {
+                meta["timings"] = {
                     "audio_read_s": round(_t_audio_read_end - _t_audio_read_start, 4),
                     "prompt_compose_s": round(_t_prompt_compose_end - _t_prompt_compose_start, 4),
                     "gemini_api_call_s": round(_t_gemini_api_end - _t_gemini_api_start, 4),
@@ -593,16 +719,16 @@ class GeminiClient:
                     "retry_finish_reason": _retry_finish_reason,
                 }
                 if _retry_triggered:
-                    self._last_audio_timings["gemini_retry_s"] = round(_t_retry_end - _t_retry_start, 4)
-                self._last_audio_parse_mode = _parse_mode
-                self.logger.info("[Timing] transcribe_audio: %s", self._last_audio_timings)
-                return self._last_audio_clean
+                    meta["timings"]["gemini_retry_s"] = round(_t_retry_end - _t_retry_start, 4)
+                meta["parse_mode"] = _parse_mode
+                self.logger.info("[Timing] transcribe_audio: %s", meta["timings"])
+                return meta["clean"]
 
             self.logger.error(f"回應不是 JSON 格式: {result_text}")
             _parse_mode = "json_parse_failed"
             _t_end = time.time()
             _retry_triggered = _t_retry_start is not None and _t_retry_end is not None
-            self._last_audio_timings = {
+            meta["timings"] = {
                 "audio_read_s": round(_t_audio_read_end - _t_audio_read_start, 4),
                 "prompt_compose_s": round(_t_prompt_compose_end - _t_prompt_compose_start, 4),
                 "gemini_api_call_s": round(_t_gemini_api_end - _t_gemini_api_start, 4),
@@ -616,9 +742,9 @@ class GeminiClient:
                 "error": "json_parse_failed",
             }
             if _retry_triggered:
-                self._last_audio_timings["gemini_retry_s"] = round(_t_retry_end - _t_retry_start, 4)
-            self._last_audio_parse_mode = _parse_mode
-            self.logger.info("[Timing] transcribe_audio (error): %s", self._last_audio_timings)
+                meta["timings"]["gemini_retry_s"] = round(_t_retry_end - _t_retry_start, 4)
+            meta["parse_mode"] = _parse_mode
+            self.logger.info("[Timing] transcribe_audio (error): %s", meta["timings"])
             error_result = json.dumps({
                 "error": "JSON 解析錯誤",
                 "raw_transcript": "",
@@ -626,7 +752,7 @@ class GeminiClient:
                 "original": "語音識別格式錯誤，請重試",
                 "options": [] if option_count == 0 else ["語音識別格式錯誤，請重試"]
             }, ensure_ascii=False)
-            self._last_audio_clean = error_result
+            meta["clean"] = error_result
             return error_result
 
         except Exception as e:
@@ -122,6 +122,36 @@ def test_config_with_custom_file():
         print(f"❌ 自定義配置文件測試失敗: {e}")
         return False
 
+def test_config_cache_reload():
+    """測試 enabled/模型配置緩存與 reload 失效"""
+    from src.core.dspy.config import DSPyConfig
+    
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
+        yaml.dump({'dspy': {'enabled': False, 'model': 'model-a'}}, f)
+        temp_config_path = f.name
+    
+    try:
+        config = DSPyConfig(temp_config_path)
+        assert config.is_dspy_enabled() is False
+        assert config.get_model_config()['model'] == 'model-a'
+        
+        # 呼叫端修改回傳值不應污染緩存
+        model_config = config.get_model_config()
+        model_config.pop('provider', None)
+        assert config.get_model_config()['provider'] == 'gemini'
+        
+        with open(temp_config_path, 'w', encoding='utf-8') as f:
+            yaml.dump({'dspy': {'enabled': True, 'model': 'model-b'}}, f)
+        
+        # reload 前仍為緩存值，reload 後反映新配置
+        assert config.is_dspy_enabled() is False
+        assert config.get_model_config()['model'] == 'model-a'
+        config.reload_config()
+        assert config.is_dspy_enabled() is True
+        assert config.get_model_config()['model'] == 'model-b'
+    finally:
+        os.unlink(temp_config_path)
+
 def run_all_tests():
     """運行所有配置測試"""
     print("🚀 開始 DSPy 配置測試...")
@@ -130,7 +160,8 @@ def run_all_tests():
     tests = [
         test_config_loading,
         test_config_methods,
-        test_config_with_custom_file
+        test_config_with_custom_file,
+        test_config_cache_reload
     ]
     
     passed = 0
@@ -138,7 +169,8 @@ def run_all_tests():
     
     for test_func in tests:
         try:
-            if test_func():
+            # 純 assert 型測試回傳 None，只有明確回傳 False 才算失敗
+            if test_func() is not False:
                 passed += 1
         except Exception as e:
             print(f"❌ 測試 {test_func.__name__} 出現未預期錯誤: {e}")
@@ -11,7 +11,7 @@ import os
 sys.path.insert(0, os.getcwd())
 sys.path.insert(0, '/app')
 
-from src.core.dspy.consistency_checker import DialogueConsistencyChecker
+from src.core.dspy.consistency_checker import DialogueConsistencyChecker, MedicalFactTracker
 
 
 def test_bootstrap_noop():
@@ -55,5 +55,23 @@ def test_timeline_inconsistency_detection():
     history = ["病患: 今天早上開始覺得有點熱"]
     new_responses = ["我昨晚開始發燒，半夜有點不舒服"]
     result = checker.check_consistency(new_responses=new_responses, conversation_history=history, character_context=None)
-    assert any(c.type == 'timeline_inconsistency' for c in result.contradictions)
+    timeline_issues = [c for c in result.contradictions if c.type == 'timeline_inconsistency']
+    assert timeline_issues
+    events = timeline_issues[0].evidence["events"]
+    assert all(isinstance(e, dict) and {"type", "when", "norm_time"} <= e.keys() for e in events)
 
+
+
+def test_overlapping_time_tokens_all_extracted():
+    # 「目前天氣」同時包含 目前 與 前天（重疊字元），兩類時間語彙都應產生事件
+    events = MedicalFactTracker().extract_timeline("目前天氣不錯")
+    assert [(e.when, e.norm_time) for e in events] == [("目前", 1.0), ("前天", 0.5)]
+
+
+def test_empty_inputs_return_clean_result():
+    checker = DialogueConsistencyChecker()
+    result = checker.check_consistency(new_responses=[""], conversation_history=[], character_context=None)
+    assert result.score == 1.0
+    assert result.has_contradictions is False
+    assert result.severity == 'low'
+    assert result.facts == {"previous": {"fever": None, "pain": None}, "new": {"fever": None, "pain": None}}